@@ -0,0 +1,58 @@
+"""并发执行组基准：同一事件的多个非阻塞处理器顺序执行与并发执行的延迟对比
+
+    python benchmarks/bench_concurrent_handlers.py [处理器数] [单个处理器耗时(秒)] [事件数]
+"""
+# standard library
+import sys
+import time
+import asyncio
+from types import SimpleNamespace
+
+# local library
+from weelink.core.flow import MessageBroker
+from weelink.core.flow.event import EventType
+from weelink.core.on.registry import HandleRegistry
+
+
+async def main(handlers: int = 8, delay: float = 0.05, events: int = 20) -> None:
+    async def callback(self, event) -> None:
+        await asyncio.sleep(delay)
+
+    registered = [
+        HandleRegistry.register(
+            priority=1,
+            temp=False,
+            block=False,
+            expire_time=0,
+            callback=callback,
+            module="bench",
+            event_type=EventType.TEXT,
+            rule=None
+        )
+        for _ in range(handlers)
+    ]
+    plugin = SimpleNamespace(module="bench", obj=object(), adapters=None, timeout=None)
+    HandleRegistry.bind(registered, plugin)
+
+    broker = MessageBroker()
+    event = SimpleNamespace(
+        event_type=EventType.TEXT,
+        component=SimpleNamespace(text="hello"),
+        sender=SimpleNamespace(wxid="wxid_sender"),
+        conversation_id="room",
+        degraded=False,
+        memo={}
+    )
+    for label, dispatch in (
+        ("sequential", broker._dispatch_sequentially),
+        ("concurrent", broker._dispatch_concurrently)
+    ):
+        start = time.perf_counter()
+        for _ in range(events):
+            await dispatch(event)
+        elapsed = (time.perf_counter() - start) / events
+        print(f"{label:<12}{elapsed * 1e3:>8.1f} ms/event  ({handlers} handlers x {delay * 1e3:.0f} ms)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*(cast(arg) for cast, arg in zip((int, float, int), sys.argv[1:4]))))
@@ -0,0 +1,84 @@
+"""关键词规则基准：逐条规则扫描文本与共享 Aho-Corasick 索引路由的耗时对比
+
+naive 对每条规则逐个查找关键词；indexed 经 HandleRegistry.route 一次扫描文本，
+只对命中的处理器执行规则检查(与分发时一致)
+
+    python benchmarks/bench_keywords.py [关键词数...]
+"""
+# standard library
+import sys
+import time
+import random
+import string
+from types import SimpleNamespace
+
+# local library
+from weelink.core.flow.event import EventType
+from weelink.core.on.registry import HandleRegistry
+from weelink.core.on.rule import keyword
+
+
+ROUNDS = 200
+
+
+async def callback(self, event) -> None:
+    pass
+
+
+def per_event(func: callable) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        func()
+    return (time.perf_counter() - start) / ROUNDS * 1e6
+
+
+def main(sizes: list[int]) -> None:
+    rng = random.Random(0)
+    alphabet = string.ascii_lowercase + "你我他的了是在有"
+    text = "".join(rng.choice(alphabet) for _ in range(200))
+
+    print(f"{'keywords':>10}{'naive':>14}{'indexed':>14}{'speedup':>10}")
+    for size in sizes:
+        keywords = list({"".join(rng.choice(alphabet) for _ in range(rng.randint(3, 8))) for _ in range(size)})
+        plugin = SimpleNamespace(module=f"bench_{size}", obj=object(), adapters=None, timeout=None)
+        handlers = [
+            HandleRegistry.register(
+                priority=1,
+                temp=False,
+                block=False,
+                expire_time=0,
+                callback=callback,
+                module=plugin.module,
+                event_type=EventType.TEXT,
+                rule=keyword([word])
+            )
+            for word in keywords
+        ]
+        HandleRegistry.bind(handlers, plugin)
+        checkers = [handler.rule.checkers[0] for handler in handlers]
+        # 确保至少命中一个关键词
+        sample = text + keywords[0]
+
+        def naive() -> int:
+            return sum(any(word in sample for word in checker.keywords) for checker in checkers)
+
+        def indexed() -> int:
+            event = SimpleNamespace(
+                event_type=EventType.TEXT,
+                component=SimpleNamespace(text=sample),
+                sender=SimpleNamespace(wxid="wxid_sender"),
+                conversation_id="room",
+                memo={}
+            )
+            return sum(bool(entry.rule_check(event)) for entry in HandleRegistry.route(event))
+
+        assert naive() == indexed()
+        naive_us = per_event(naive)
+        indexed_us = per_event(indexed)
+        print(f"{len(keywords):>10}{naive_us:>11.1f} us{indexed_us:>11.1f} us{naive_us / indexed_us:>9.1f}x")
+
+        HandleRegistry.unregister_many(HandleRegistry.get_handlers_from_plugin(plugin))
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or [100, 1000, 5000, 20000])
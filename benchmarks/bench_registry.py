@@ -0,0 +1,79 @@
+"""HandleRegistry 微基准：10k 处理器的注册、绑定、编译、查询与插件卸载
+
+    python benchmarks/bench_registry.py [处理器数] [模块数]
+"""
+# standard library
+import sys
+import time
+from types import SimpleNamespace
+
+# local library
+from weelink.core.flow.event import EventType
+from weelink.core.on.registry import HandleRegistry
+from weelink.core.on.rule import keyword
+
+
+EVENT_TYPES = [EventType.TEXT, EventType.IMAGE, EventType.QUOTE, EventType.LINK]
+
+
+def timed(label: str, func: callable) -> any:
+    start = time.perf_counter()
+    result = func()
+    print(f"{label:<28}{(time.perf_counter() - start) * 1e3:>10.1f} ms")
+    return result
+
+
+async def callback(self, event) -> None:
+    pass
+
+
+def main(handlers: int = 10000, modules: int = 100) -> None:
+    per_module = handlers // modules
+    plugins = [
+        SimpleNamespace(module=f"plugin_{index}", obj=object(), adapters=None, timeout=None)
+        for index in range(modules)
+    ]
+
+    def register() -> list[list]:
+        return [
+            [
+                HandleRegistry.register(
+                    priority=index % 10,
+                    temp=False,
+                    block=False,
+                    expire_time=0,
+                    callback=callback,
+                    module=plugin.module,
+                    event_type=EVENT_TYPES[index % len(EVENT_TYPES)],
+                    rule=keyword([f"kw{plugin.module}_{index}"])
+                )
+                for index in range(per_module)
+            ]
+            for plugin in plugins
+        ]
+
+    registered = timed(f"register {handlers}", register)
+    timed(f"bind {modules} plugins", lambda: [
+        HandleRegistry.bind(handlers, plugin) for handlers, plugin in zip(registered, plugins)
+    ])
+    timed("compile all plans", lambda: [HandleRegistry.get_plan(event_type) for event_type in EVENT_TYPES])
+    ids = [handler.id for handlers in registered for handler in handlers]
+    timed(f"{len(ids)} id lookups", lambda: [HandleRegistry.get_handler_from_id(handler_id) for handler_id in ids])
+
+    event = SimpleNamespace(
+        event_type=EventType.TEXT,
+        component=SimpleNamespace(text="hello kwplugin_7_12 world"),
+        sender=SimpleNamespace(wxid="wxid_sender"),
+        conversation_id="room",
+        memo={}
+    )
+    timed("route one event (cold)", lambda: HandleRegistry.route(event))
+    event.memo = {}
+    timed("route one event (warm)", lambda: HandleRegistry.route(event))
+    timed(f"disable {modules} plugins", lambda: [
+        HandleRegistry.unregister_many(HandleRegistry.get_handlers_from_plugin(plugin)) for plugin in plugins
+    ])
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:3]))
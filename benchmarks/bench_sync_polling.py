@@ -0,0 +1,127 @@
+"""同步轮询基准：本地模拟 /Msg/Sync 协议服务，对比固定间隔与自适应轮询的消息延迟和请求频率
+
+模拟服务每次处理耗时 5ms，单次最多下发 20 条消息；消息按泊松分布到达并夹杂突发，
+最后统计完全空闲时每秒的请求数
+
+    python benchmarks/bench_sync_polling.py [每轮秒数] [端口]
+"""
+# standard library
+import sys
+import time
+import random
+import asyncio
+import statistics
+from aiohttp import web
+
+# local library
+from weelink.core.utils.http import post
+from weelink.core.adapter.sources.wechatpad855.polling import AdaptivePolling
+
+
+class SyncServer:
+    """模拟协议服务，积压的消息以入队时间(monotonic)表示"""
+
+    def __init__(self, port: int) -> None:
+        self.port = port
+        self.pending: list[float] = []
+        self.calls = 0
+        self._runner: web.AppRunner = None
+
+
+    async def sync(self, request: web.Request) -> web.Response:
+        self.calls += 1
+        await asyncio.sleep(0.005)
+        batch, self.pending[:20] = self.pending[:20], []
+        return web.json_response({"Success": True, "Data": {"AddMsgs": batch}})
+
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_post("/Msg/Sync", self.sync)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", self.port).start()
+
+
+    async def stop(self) -> None:
+        await self._runner.cleanup()
+
+
+async def produce(server: SyncServer, duration: float) -> None:
+    """平均每秒一条消息，20% 的概率出现 20~60 条的突发
+
+    使用独立的随机数生成器，轮询抖动不影响消息序列，各策略面对相同的流量
+    """
+    rng = random.Random(7)
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        if rng.random() < 0.2:
+            for _ in range(rng.randint(20, 60)):
+                server.pending.append(time.monotonic())
+                await asyncio.sleep(0.01)
+        else:
+            server.pending.append(time.monotonic())
+        await asyncio.sleep(rng.expovariate(1.0))
+
+
+async def consume(server: SyncServer, policy: callable, stop: asyncio.Event) -> list[float]:
+    """按策略轮询，返回每条消息从入队到被拉取的延迟"""
+    latencies = []
+    while not stop.is_set():
+        response = await post(f"http://127.0.0.1:{server.port}/Msg/Sync", body={})
+        messages = response["Data"]["AddMsgs"]
+        now = time.monotonic()
+        latencies += [now - queued for queued in messages]
+        await asyncio.sleep(policy(bool(messages)))
+    return latencies
+
+
+async def run(server: SyncServer, label: str, policy: callable, duration: float) -> None:
+    server.calls = 0
+    server.pending.clear()
+    stop = asyncio.Event()
+    consumer = asyncio.create_task(consume(server, policy, stop))
+    await produce(server, duration)
+    # 留出时间拉取剩余消息
+    await asyncio.sleep(2.5)
+    stop.set()
+    latencies = sorted(await consumer)
+    print(
+        f"{label:<22}msgs={len(latencies):<5}"
+        f"p50={statistics.median(latencies) * 1e3:>6.0f} ms  "
+        f"p95={latencies[int(len(latencies) * 0.95)] * 1e3:>6.0f} ms  "
+        f"max={latencies[-1] * 1e3:>6.0f} ms  "
+        f"calls/s={server.calls / (duration + 2.5):.1f}"
+    )
+
+
+async def idle(server: SyncServer, label: str, policy: callable, duration: float) -> None:
+    server.calls = 0
+    server.pending.clear()
+    stop = asyncio.Event()
+    consumer = asyncio.create_task(consume(server, policy, stop))
+    await asyncio.sleep(duration)
+    stop.set()
+    await consumer
+    print(f"{'idle ' + label:<22}calls/s={server.calls / duration:.2f}")
+
+
+async def main(duration: float = 30, port: int = 18855) -> None:
+    server = SyncServer(port)
+    await server.start()
+    try:
+        policies = (
+            ("fixed 0.5s", lambda busy: 0.5),
+            ("adaptive 0.05-2s", AdaptivePolling(0.05, 2.0).next),
+            ("adaptive 0.05-0.5s", AdaptivePolling(0.05, 0.5).next)
+        )
+        for label, policy in policies:
+            await run(server, label, policy, duration)
+        for label, policy in policies[:2]:
+            await idle(server, label, policy, min(duration, 20))
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*(cast(arg) for cast, arg in zip((float, int), sys.argv[1:3]))))
@@ -0,0 +1,80 @@
+# standard library
+import asyncio
+from types import SimpleNamespace
+
+# third party
+import pytest
+
+# local library
+from weelink.core.flow.event import EventType
+from weelink.core.middleware.sources.rate_limit import (
+    LocalBucketBackend, RedisBucketBackend, RateLimitMiddleware
+)
+
+
+def _event(sender: str, conversation: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        event_type=EventType.TEXT,
+        sender=SimpleNamespace(wxid=sender),
+        conversation_id=conversation
+    )
+
+
+async def _next() -> str:
+    return "passed"
+
+
+def _redis_backend() -> RedisBucketBackend:
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    return RedisBucketBackend(client=fakeredis.FakeAsyncRedis())
+
+
+async def _run(backend) -> RateLimitMiddleware:
+    middleware = RateLimitMiddleware(backend=backend)
+    # 补充速率极低，测试期间不会回填令牌
+    middleware.limits = {
+        "sender": (0.001, 2),
+        "conversation": (0.001, 3),
+        "global": (0.001, 5)
+    }
+    traffic = [
+        ("alice", "room1"), ("alice", "room1"), ("alice", "room1"),  # 第三条超出发送者配额
+        ("bob", "room1"), ("carol", "room1"),                        # carol 超出会话配额
+        ("dave", "room2"), ("erin", "room2"), ("frank", "room3")     # frank 超出全局配额
+    ]
+    results = [await middleware.process(_event(*item), None, _next) for item in traffic]
+    assert results == ["passed", "passed", None, "passed", None, "passed", "passed", None]
+    return middleware
+
+
+@pytest.mark.parametrize("make_backend", [lambda: LocalBucketBackend(100), _redis_backend], ids=["local", "redis"])
+def test_drop_counts_per_scope(make_backend):
+    middleware = asyncio.run(_run(make_backend()))
+    assert dict(middleware.dropped) == {"sender": 1, "conversation": 1, "global": 1}
+    assert middleware.errors == 0
+
+
+def test_redis_bucket_refills():
+    backend = _redis_backend()
+
+    async def scenario():
+        assert await backend.acquire("sender:alice", rate=1000, burst=1)
+        await asyncio.sleep(0.01)
+        assert await backend.acquire("sender:alice", rate=1000, burst=1)
+        assert not await backend.acquire("sender:bob", rate=0.001, burst=1, cost=2)
+
+    asyncio.run(scenario())
+
+
+def test_backend_error_fails_open():
+    class Broken:
+        async def eval(self, *args):
+            raise ConnectionError("redis down")
+
+    async def scenario():
+        middleware = RateLimitMiddleware(backend=RedisBucketBackend(client=Broken()))
+        assert await middleware.process(_event("alice", "room1"), None, _next) == "passed"
+        return middleware
+
+    assert asyncio.run(scenario()).errors == 1
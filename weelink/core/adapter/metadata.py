@@ -11,11 +11,12 @@ class ConfigField:
     """适配器配置字段"""
     label: str
     key: str
-    type: Literal["string", "boolean"]
+    type: Literal["string", "boolean", "number"]
     required: bool = False
     placeholder: str = ""
     description: str = ""
     default: Optional[any] = None
+    options: Optional[list] = None
 
     def to_dict(self) -> dict:
         return {
@@ -0,0 +1,26 @@
+# standard library
+import random
+
+
+class AdaptivePolling:
+    """自适应轮询间隔
+
+    上一次同步拿到数据时立即再次同步，空闲或失败时从 minimum 开始按 factor 指数退避，
+    不超过 maximum。每次等待在 [1 - jitter, 1] 倍之间随机，避免多个账号同时请求协议
+    """
+
+    def __init__(self, minimum: float, maximum: float, factor: float = 2.0, jitter: float = 0.2) -> None:
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.factor = factor
+        self.jitter = jitter
+        self.interval = 0.0
+
+
+    def next(self, busy: bool) -> float:
+        """返回下一次同步前需要等待的秒数"""
+        if busy:
+            self.interval = 0.0
+            return 0.0
+        self.interval = min(self.maximum, max(self.minimum, self.interval * self.factor))
+        return self.interval * random.uniform(1 - self.jitter, 1)
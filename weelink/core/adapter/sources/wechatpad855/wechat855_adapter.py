@@ -1,6 +1,6 @@
 # standard library
 import io
-import re
+import json
 import math
 import time
 import pysilk
@@ -9,22 +9,24 @@ import base64
 import asyncio
 import filetype
 import aiofiles
+import aiohttp
 from PIL import Image, ImageFile
 from xml.etree import ElementTree
 
 # local library
 from .api_mixin import ApiMixin
 from .docs_mixin import DocsMixin
+from .polling import AdaptivePolling
 from weelink.core.flow import get_broker, EventType
 from weelink.core.adapter import Adapter, registry_adapter
 from weelink.core.adapter.metadata import ConfigField
 from weelink.core.message import (
     Text, File, Link, Quote, MessageSource, MessageComponent, 
-    XmlType, AddMsgType, MessageEvent
+    XmlType, AddMsgType, MessageEvent, strip_mentions
 )
 from weelink.core.utils import (
     create_device_name, create_device_id, logger, get, find_temp_file,
-    TEMP_DIR
+    create_deduplicator, TEMP_DIR
 )
 
 
@@ -45,9 +47,33 @@ class WechatPad855Adapter(Adapter, ApiMixin, DocsMixin):
             required=True,
             placeholder="请输入协议服务地址",
             description="协议服务地址，例如：http://127.0.0.1:8000"
+        ),
+        ConfigField(
+            label="最短同步间隔",
+            key="sync_min_interval",
+            type="number",
+            default=0.05,
+            description="空闲时第一次退避的等待秒数，有新消息时不等待立即同步"
+        ),
+        ConfigField(
+            label="最长同步间隔",
+            key="sync_max_interval",
+            type="number",
+            default=2.0,
+            description="持续空闲时指数退避的上限秒数，决定空闲后第一条消息的最大延迟"
+        ),
+        ConfigField(
+            label="同步失败容忍时间",
+            key="sync_failure_timeout",
+            type="number",
+            default=300,
+            description="同步持续失败超过该秒数后退出消息处理循环"
         )
     ]
     
+    """转换时可能需要下载媒体文件的消息类型"""
+    SLOW_MSG_TYPES = frozenset({AddMsgType.IMAGE, AddMsgType.VOICE, AddMsgType.VIDEO, AddMsgType.APPMSG})
+
     def __init__(self, adapter_config: dict):
         self.is_logged = False
         self.adapter_config = adapter_config
@@ -62,6 +88,14 @@ class WechatPad855Adapter(Adapter, ApiMixin, DocsMixin):
         self.phone = self.adapter_config.get("phone", "")
         self.device_name = self.adapter_config.get("device_name", "") or create_device_name()
         self.device_id = self.adapter_config.get("device_id", "") or create_device_id()
+        # 同步轮询间隔
+        self.polling = AdaptivePolling(
+            float(self.adapter_config.get("sync_min_interval") or 0.05),
+            float(self.adapter_config.get("sync_max_interval") or 2.0)
+        )
+        self.sync_failure_timeout = float(self.adapter_config.get("sync_failure_timeout") or 300)
+        # 重连时协议可能重复下发 AddMsgs，在转换之前去重
+        self.deduplicator = create_deduplicator("wechatpad855")
 
     
     async def run(self) -> None:
@@ -94,28 +128,63 @@ class WechatPad855Adapter(Adapter, ApiMixin, DocsMixin):
             return logger.warning(f"账号{self.wxid}登录失败，请检查日志文件")
         
         # 轮询消息
-        failure_count, max_failures = 0, 3
+        # 按持续失败的时长而不是次数判断，退避间隔很短时几次失败不代表协议不可用
+        failing_since = None
         while True:
-            status, data = await self.api_sync_message()
+            try:
+                status, data = await self.api_sync_message()
+            except (aiohttp.ClientError, TimeoutError, json.JSONDecodeError) as e:
+                # 只把网络和响应解析错误计为失败，其余异常照常抛出；每轮连续失败只记录一次堆栈
+                if failing_since is None:
+                    logger.opt(exception=e).warning(f"同步消息请求失败: {e!r}")
+                else:
+                    logger.warning(f"同步消息请求失败: {e!r}")
+                status, data = False, None
+            busy = False
         
-            if not status or data is None:
-                failure_count += 1
-                if failure_count > max_failures:
-                    return logger.critical("接收消息失败次数过多，退出消息处理循环")
-            failure_count = 0
+            if not status:
+                failing_since = failing_since or time.monotonic()
+                if time.monotonic() - failing_since > self.sync_failure_timeout:
+                    return logger.critical(f"接收消息持续失败超过 {self.sync_failure_timeout:g}s，退出消息处理循环")
+            else:
+                # 成功但没有数据(Data 为空)视为空闲
+                failing_since = None
             if isinstance(data, dict):
-                for item in (data.get("AddMsgs") or []):
-                    await self.process_message("AddMessage", item)
-                for item in (data.get("ModContacts") or []):
-                    await self.process_message("ModContact", item)
+                # 连续的快速消息攒成一批交给 broker；转换前需要下载媒体的消息会先发布已攒下的事件，
+                # 避免排在前面的文本等待后面的下载
+                add_msgs = data.get("AddMsgs") or []
+                mod_contacts = data.get("ModContacts") or []
+                busy = bool(add_msgs or mod_contacts)
+                events = []
+                for item in add_msgs:
+                    if item.get("MsgType") in self.SLOW_MSG_TYPES and events:
+                        await get_broker().publish_many(events)
+                        events = []
+                    if event := await self.convert_message("AddMessage", item):
+                        events.append(event)
+                for item in mod_contacts:
+                    if event := await self.convert_message("ModContact", item):
+                        events.append(event)
+                await get_broker().publish_many(events)
             elif isinstance(data, str):
                 if "已退出登录" in data or "会话已过期" in data:
                     return logger.warning(f"接收到退出消息")      
             
-            await asyncio.sleep(0.5)
+            # 有数据时立即继续同步，空闲或失败时指数退避
+            await asyncio.sleep(self.polling.next(busy))
 
 
     async def process_message(self, type: str, raw_data: dict) -> None:
+        """转换单条消息并发布"""
+        if event := await self.convert_message(type, raw_data):
+            await get_broker().publish(event)
+
+
+    async def convert_message(self, type: str, raw_data: dict) -> MessageEvent:
+        """将协议传来的原始消息转换为事件"""
+        if type == "AddMessage" and await self.is_duplicate(raw_data):
+            return
+        
         # 将通用信息独立出来，避免convert_message和convert_event耦合
         common_data = await self.extract_common_data(type, raw_data)
         if common_data is None:
@@ -125,9 +194,17 @@ class WechatPad855Adapter(Adapter, ApiMixin, DocsMixin):
         if component is None:
             return
         
-        event = await self.convert_event(type, common_data, component)
-        if event:
-            await get_broker().publish(event)
+        return await self.convert_event(type, common_data, component)
+
+
+    async def is_duplicate(self, raw_data: dict) -> bool:
+        """按 NewMsgId(缺失时用 MsgId) 判断消息是否已处理过"""
+        msg_id = raw_data.get("NewMsgId") or raw_data.get("MsgId")
+        if msg_id is None:
+            return False
+        if duplicate := await self.deduplicator.seen(f"{self.wxid}:{msg_id}"):
+            logger.debug(f"重复消息 {msg_id} 已忽略")
+        return duplicate
 
 
     async def extract_common_data(self, type: str, data: dict) -> dict:
@@ -205,11 +282,8 @@ class WechatPad855Adapter(Adapter, ApiMixin, DocsMixin):
             msg_type = common_data["msg_type"]
             # 具体消息处理
             if msg_type == AddMsgType.TEXT:
-                text = component_params["content"]
-                if '\u2005' in text:  # 特殊空格，通常用于@消息
-                    text = re.sub(r'@[^\u2005]*\u2005', '', text)
                 return Text(
-                    text=text,
+                    text=strip_mentions(component_params["content"]),
                     **component_params
                 )
             elif msg_type == AddMsgType.VOICE:
@@ -389,8 +463,7 @@ class WechatPad855Adapter(Adapter, ApiMixin, DocsMixin):
                     if type == XmlType.QUOTE:
                         title = appmsg.findtext("title")
                         # 去掉at信息，获得纯文本
-                        if '\u2005' in title:
-                            title = re.sub(r'@[^\u2005]*\u2005', '', title)
+                        title = strip_mentions(title)
                         
                         if (refermsg := appmsg.find("refermsg")) is None:
                             return logger.error("XML 消息未能找到 refermsg")
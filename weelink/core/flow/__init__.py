@@ -1,4 +1,5 @@
 from .broker import MessageBroker, get_broker
-from .event import EventType
+from .event import EventType, NON_SYSTEM_EVENTS
 from .executor import execute
-from .metadata import HandlerMetaData
\ No newline at end of file
+from .metadata import HandlerMetaData
+from .plan import DispatchEntry, DispatchPlan, DispatchGroups
\ No newline at end of file
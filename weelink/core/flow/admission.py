@@ -0,0 +1,75 @@
+# standard library
+import time
+from enum import Enum
+from collections import Counter
+from typing import TYPE_CHECKING
+
+# local library
+from .event import EventType, event_class
+from weelink.core.utils import logger
+
+if TYPE_CHECKING:
+    from weelink.core.message import MessageEvent
+
+
+class AdmissionPolicy(str, Enum):
+    """事件延迟超过阈值时的处理方式"""
+    PROCESS = "process"
+    DEGRADE = "degrade"
+    SKIP = "skip"
+
+
+def resolve_policies(
+    policies: dict[str, str],
+    default: AdmissionPolicy = AdmissionPolicy.PROCESS
+) -> dict[EventType, AdmissionPolicy]:
+    """按 EventType 名称或调度类别解析各事件类型的处理方式，名称优先于类别"""
+    return {
+        event_type: AdmissionPolicy(
+            policies.get(event_type.name)
+            or policies.get(event_class(event_type).value)
+            or default
+        )
+        for event_type in EventType
+    }
+
+
+class AdmissionControl:
+    """出队时根据事件延迟决定处理、降级或丢弃"""
+
+    def __init__(self, max_lag: float, policies: dict[str, str]) -> None:
+        self.max_lag = max_lag
+        self.shed: Counter = Counter()
+        self.degraded: Counter = Counter()
+        self._policies: dict[EventType, AdmissionPolicy] = resolve_policies(policies)
+
+
+    def admit(self, event: "MessageEvent") -> bool:
+        """返回事件是否需要继续处理，降级的事件会被标记"""
+        if not self.max_lag:
+            return True
+
+        try:
+            lag = time.time() - int(event.component.create_time)
+        except (AttributeError, TypeError, ValueError):
+            return True
+        if lag <= self.max_lag:
+            return True
+
+        policy = self._policies.get(event.event_type, AdmissionPolicy.PROCESS)
+        if policy == AdmissionPolicy.SKIP:
+            self.shed[event.event_type.name] += 1
+            logger.debug(f"事件 {event.event_type} 延迟 {lag:.0f}s，已丢弃")
+            return False
+        if policy == AdmissionPolicy.DEGRADE:
+            self.degraded[event.event_type.name] += 1
+            event.degraded = True
+        return True
+
+
+    def stats(self) -> dict:
+        return {
+            "max_lag": self.max_lag,
+            "shed": dict(self.shed),
+            "degraded": dict(self.degraded)
+        }
@@ -1,56 +1,204 @@
 # standard library
 import asyncio
-from typing import TYPE_CHECKING
+from collections import defaultdict
+from typing import TYPE_CHECKING, Coroutine, Iterable
 
 # local library
-from .executor import execute
+from .executor import execute, timeout_counter
+from .admission import AdmissionControl
+from .plan import DispatchEntry
+from .lane import LaneQueue
+from .queue import DispatchQueue, OverflowPolicy
 from weelink.core.utils import logger
+from weelink.core.internal.config import conf
 from weelink.core.middleware import MiddlewareManager
 from weelink.core.on.registry import HandleRegistry
+from weelink.core.on.evaluator import ResultCache, RuleStats
 
 if TYPE_CHECKING:
     from weelink.core.message import MessageEvent
 
 
 class MessageBroker:
-    
+
     def __init__(self) -> None:
         self._background_tasks = set()
         self.middleware_manager = None
-    
-    
-    async def publish(self, event: "MessageEvent") -> None:    
+
+        # 分发模式: task 每个事件一个任务; queue 有界队列 + 固定数量的 worker;
+        # lane 按会话分片，同一会话内有序，不同会话之间并行
+        self.mode = conf.BROKER_MODE
+        self.worker_count = max(1, conf.BROKER_WORKERS)
+        self._queue: DispatchQueue | LaneQueue = None
+        self._workers: list[asyncio.Task] = []
+        self._busy_workers = 0
+
+        # 同一执行组内的非阻塞处理器并发执行
+        self.concurrent_handlers = conf.BROKER_CONCURRENT_HANDLERS
+
+        # 出队时丢弃或降级延迟过高的事件
+        self.admission = AdmissionControl(
+            max_lag=conf.ADMISSION_MAX_LAG,
+            policies=conf.ADMISSION_POLICIES
+        )
+
+        # 统计信息
+        self._published = 0
+        self._processed = 0
+
+
+    async def publish(self, event: "MessageEvent") -> None:
         """发布事件，立即返回，实际处理在后台进行"""
-        task = asyncio.create_task(self._process_event(event))
+        self._published += 1
+        if self.mode in ("queue", "lane"):
+            if not self._workers:
+                self.start()
+            await self._queue.put(event)
+            return
+
+        self._spawn(self._process_event(event))
+
+
+    async def publish_many(self, events: list["MessageEvent"]) -> None:
+        """批量发布事件，同一会话内的事件按顺序处理"""
+        if not events:
+            return
+        self._published += len(events)
+        logger.debug(f"批量发布 {len(events)} 个事件")
+        if self.mode in ("queue", "lane"):
+            if not self._workers:
+                self.start()
+            await self._queue.put_many(events)
+            return
+
+        batches: dict[str, list["MessageEvent"]] = defaultdict(list)
+        for event in events:
+            batches[event.conversation_id].append(event)
+        for batch in batches.values():
+            self._spawn(self._process_batch(batch))
+
+
+    def _spawn(self, coro: Coroutine) -> None:
+        """创建后台任务并保持引用"""
+        task = asyncio.create_task(coro)
         task.add_done_callback(self._background_tasks.discard)
         self._background_tasks.add(task)
-    
-    
+
+
+    def start(self) -> None:
+        """启动队列模式下的 worker"""
+        if self.mode not in ("queue", "lane") or self._workers:
+            return
+        if self._queue is None:
+            self._queue = self._create_queue()
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"broker-worker-{i}")
+            for i in range(self.worker_count)
+        ]
+        logger.info(f"消息分发已启动: {self.worker_count} 个 worker, 队列容量 {self._queue.maxsize}")
+
+
+    def _create_queue(self) -> DispatchQueue | LaneQueue:
+        """根据分发模式创建事件队列"""
+        policy = OverflowPolicy(conf.BROKER_OVERFLOW_POLICY)
+        if self.mode == "lane":
+            return LaneQueue(
+                maxsize=conf.BROKER_QUEUE_SIZE,
+                policy=policy,
+                max_lanes=conf.BROKER_MAX_LANES,
+                idle_ttl=conf.BROKER_LANE_IDLE_TTL,
+                weights=conf.BROKER_CLASS_WEIGHTS
+            )
+        return DispatchQueue(
+            maxsize=conf.BROKER_QUEUE_SIZE,
+            policy=policy,
+            weights=conf.BROKER_CLASS_WEIGHTS
+        )
+
+
+    async def stop(self) -> None:
+        """停止队列模式下的 worker"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._busy_workers = 0
+
+
+    async def _worker(self) -> None:
+        """从队列中取出事件并处理"""
+        while True:
+            batch = await self._queue.get()
+            self._busy_workers += 1
+            try:
+                await self._process_batch(batch)
+            finally:
+                self._busy_workers -= 1
+                self._queue.task_done(batch)
+
+
+    async def _process_batch(self, batch: Iterable["MessageEvent"]) -> None:
+        """按顺序处理同一会话的一组事件"""
+        for event in batch:
+            await self._process_event(event)
+
+
     async def _process_event(self, event: "MessageEvent") -> None:
         """实际的事件处理逻辑"""
         try:
+            if not self.admission.admit(event):
+                return
+
             processed_event = await self.middleware_manager.process(event)
             if processed_event is None:
                 logger.debug(f"事件 {event.event_type} 被中间件过滤")
                 return
-            
+
             logger.debug(str(event))
-            # 顺序执行处理器，遇到返回False则停止
-            for handler in HandleRegistry.get_handlers_from_type(event.event_type):
-                try:
-                    should_continue = await execute(handler, processed_event)
-                    if not should_continue:
-                        return
-                except Exception as e:
-                    logger.error(f"消息订阅 {handler.id} 执行异常: {str(e)}")
-                    continue
-                    
+            if self.concurrent_handlers:
+                await self._dispatch_concurrently(processed_event)
+            else:
+                await self._dispatch_sequentially(processed_event)
+
         except Exception as e:
             logger.error(f"消息处理失败: {str(e)}")
-            
-    
+        finally:
+            self._processed += 1
+
+
+    async def _dispatch_sequentially(self, event: "MessageEvent") -> None:
+        """按优先级顺序执行处理器，遇到阻塞处理器则停止"""
+        for entry in HandleRegistry.route(event):
+            if await self._execute_safely(entry, event):
+                return
+
+
+    async def _dispatch_concurrently(self, event: "MessageEvent") -> None:
+        """按执行组调度处理器，组内并发执行，阻塞处理器单独成组"""
+        for group in HandleRegistry.route_groups(event):
+            if len(group) == 1:
+                if await self._execute_safely(group[0], event):
+                    return
+                continue
+            async with asyncio.TaskGroup() as tg:
+                for entry in group:
+                    tg.create_task(self._execute_safely(entry, event))
+
+
+    async def _execute_safely(self, entry: DispatchEntry, event: "MessageEvent") -> bool:
+        """执行单个处理器，异常不影响其他处理器"""
+        try:
+            return await execute(entry, event)
+        except Exception as e:
+            logger.error(f"消息订阅 {entry.handler.id} 执行异常: {str(e)}")
+            return False
+
+
     async def wait_for_completion(self) -> None:
         """等待所有后台任务完成"""
+        if self._queue is not None and self._workers:
+            await self._queue.join()
+            await self.stop()
         if self._background_tasks:
             await asyncio.gather(*self._background_tasks, return_exceptions=True)
 
@@ -60,6 +208,33 @@ class MessageBroker:
         self.middleware_manager = manager
 
 
+    def stats(self) -> dict:
+        """返回分发状态，包括队列深度和 worker 利用率"""
+        queued = self._queue.qsize() if self._queue is not None else 0
+        scheduler = self._queue.scheduler if self._queue is not None else None
+        workers = len(self._workers)
+        return {
+            "mode": self.mode,
+            "published": self._published,
+            "processed": self._processed,
+            "dropped": self._queue.dropped if self._queue is not None else 0,
+            "queue_size": queued,
+            "queue_capacity": self._queue.maxsize if self._queue is not None else 0,
+            "lanes": getattr(self._queue, "lane_count", 0),
+            "class_weights": {cls.value: weight for cls, weight in scheduler.weights.items()} if scheduler else {},
+            "class_queued": scheduler.class_sizes() if scheduler else {},
+            "class_served": {cls.value: count for cls, count in scheduler.served.items()} if scheduler else {},
+            "workers": workers,
+            "busy_workers": self._busy_workers,
+            "utilisation": self._busy_workers / workers if workers else 0.0,
+            "handler_timeouts": sum(timeout_counter.values()),
+            "admission": self.admission.stats(),
+            "rule_checkers": RuleStats.snapshot(),
+            "rule_cache": ResultCache.stats(),
+            "background_tasks": len(self._background_tasks)
+        }
+
+
 _broker = None
 
 def get_broker():
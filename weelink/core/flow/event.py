@@ -30,4 +30,50 @@ class EventType(Enum):
     CHATROOM_ADD = auto()
     CHATROOM_DEL = auto()
     CHATROOM_INCREASE = auto()
-    CHATROOM_DECREASE = auto()
\ No newline at end of file
+    CHATROOM_DECREASE = auto()
+
+
+class EventClass(str, Enum):
+    """事件调度类别，不同类别之间按权重公平调度"""
+    SYSTEM = "system"
+    MESSAGE = "message"
+    MEDIA = "media"
+
+
+EVENT_CLASSES: dict[EventType, EventClass] = {
+    EventType.STARTUP: EventClass.SYSTEM,
+    EventType.SHUTDOWN: EventClass.SYSTEM,
+    EventType.PAT: EventClass.SYSTEM,
+    EventType.INVITE: EventClass.SYSTEM,
+    EventType.REVOKE: EventClass.SYSTEM,
+    EventType.ANNOUNCE: EventClass.SYSTEM,
+    EventType.TODO: EventClass.SYSTEM,
+    EventType.FRIEND_ADD: EventClass.SYSTEM,
+    EventType.FRIEND_DEL: EventClass.SYSTEM,
+    EventType.FRIEND_MODIFY: EventClass.SYSTEM,
+    EventType.CHATROOM_ADD: EventClass.SYSTEM,
+    EventType.CHATROOM_DEL: EventClass.SYSTEM,
+    EventType.CHATROOM_INCREASE: EventClass.SYSTEM,
+    EventType.CHATROOM_DECREASE: EventClass.SYSTEM,
+    EventType.TEXT: EventClass.MESSAGE,
+    EventType.EMOJI: EventClass.MESSAGE,
+    EventType.LINK: EventClass.MESSAGE,
+    EventType.QUOTE: EventClass.MESSAGE,
+    EventType.FORWARD: EventClass.MESSAGE,
+    EventType.VOICE: EventClass.MEDIA,
+    EventType.IMAGE: EventClass.MEDIA,
+    EventType.VIDEO: EventClass.MEDIA,
+    EventType.FILE: EventClass.MEDIA,
+    EventType.UPLOAD: EventClass.MEDIA,
+}
+
+
+def event_class(event_type: EventType) -> EventClass:
+    """返回事件类型所属的调度类别"""
+    return EVENT_CLASSES.get(event_type, EventClass.MESSAGE)
+
+
+"""消息与媒体事件，不含生命周期、好友与群变动等系统事件"""
+NON_SYSTEM_EVENTS: frozenset[EventType] = frozenset(
+    event_type for event_type in EventType if event_class(event_type) != EventClass.SYSTEM
+)
\ No newline at end of file
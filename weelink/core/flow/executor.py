@@ -1,10 +1,13 @@
 # standard library
-import datetime
+import math
 import asyncio
+from collections import Counter
 from typing import TYPE_CHECKING
 
 # local library
-from .metadata import HandlerMetaData
+from .plan import DispatchEntry
+from weelink.core.internal.config import conf
+from weelink.core.utils import logger
 # 避免循环导入
 from weelink.core.on.registry import HandleRegistry
 
@@ -12,44 +15,62 @@ if TYPE_CHECKING:
     from weelink.core.message import MessageEvent
 
 
+""" handler_id - 超时次数 """
+timeout_counter: Counter = Counter()
 
-async def execute(handler: HandlerMetaData, event: "MessageEvent") -> bool:
-    """执行处理器"""
+
+async def execute(entry: DispatchEntry, event: "MessageEvent") -> bool:
+    """执行处理器，返回是否阻止后续处理器"""
     # 预检查
-    if not await _pre_examine(handler, event):
-        return
-    
+    if not await _pre_examine(entry, event):
+        return False
+
+    # 降级的事件(如积压或刷屏时)使用更短的超时，避免在单个事件上耗费过多时间
+    timeout = entry.timeout
+    if event.degraded and conf.HANDLER_DEGRADED_TIMEOUT:
+        timeout = min(timeout or math.inf, conf.HANDLER_DEGRADED_TIMEOUT)
+
     # 执行处理器回调
-    if asyncio.iscoroutinefunction(handler.callback):
-        await handler.callback(event)
+    if not entry.is_coroutine:
+        entry.callback(event)
+    elif timeout is None:
+        await entry.callback(event)
     else:
-        handler.callback(event)
-    
-    return handler.block        
-    
-    
-async def _pre_examine(handler: HandlerMetaData, event: "MessageEvent") -> bool:
-    """过期检查"""
-    if handler.expire_time and datetime.datetime.now() > handler.expire_time:
-        HandleRegistry.unregister(handler=handler)
+        try:
+            async with asyncio.timeout(timeout) as cm:
+                await entry.callback(event)
+        except TimeoutError:
+            # 处理器内部抛出的 TimeoutError 不计入超时
+            if not cm.expired():
+                raise
+            timeout_counter[entry.handler.id] += 1
+            logger.warning(f"消息订阅 {entry.handler.id} 执行超过 {timeout}s，已取消")
+            return False
+
+    return entry.block
+
+
+async def _pre_examine(entry: DispatchEntry, event: "MessageEvent") -> bool:
+    handler = entry.handler
+
+    """过期检查，由时间轮在后台标记"""
+    if handler.expired:
         return False
-    
+
     """平台兼容性检查"""
-    if handler.plugin is None:
-        raise Exception("HandlerMetaData的plugin参数为空，请检查日志")
-    
-    if (accepted_adapters := handler.plugin.adapters) and event.adapter_cls not in accepted_adapters:
+    if entry.adapters and event.adapter_cls not in entry.adapters:
         return False
-    
+
     """规则检查"""
-    ctn = await handler.rule.check(event) \
-        if asyncio.iscoroutinefunction(handler.rule.check) \
-        else handler.rule.check(event)
-    if not ctn:
-        return False
-    
+    if entry.rule_check is not None:
+        ctn = await entry.rule_check(event) \
+            if entry.rule_is_coroutine \
+            else entry.rule_check(event)
+        if not ctn:
+            return False
+
     """一次性检查"""
     if handler.temp:
-        HandleRegistry.unregister(handler=handler)
-    
+        HandleRegistry.retire(handler=handler)
+
     return True
\ No newline at end of file
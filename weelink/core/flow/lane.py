@@ -0,0 +1,189 @@
+# standard library
+import time
+import asyncio
+from collections import deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+# local library
+from .event import event_class
+from .queue import OverflowPolicy, EventBatch
+from .scheduler import WeightedScheduler
+from weelink.core.utils import logger
+
+if TYPE_CHECKING:
+    from weelink.core.message import MessageEvent
+
+
+@dataclass(eq=False)
+class Lane:
+
+    """通道键(会话ID)"""
+    key: str
+
+    """排队中的事件"""
+    events: deque = field(default_factory=deque)
+
+    """是否有 worker 正在处理该通道"""
+    active: bool = False
+
+    """是否已在就绪队列中"""
+    scheduled: bool = False
+
+    """最近一次空闲的时间"""
+    idle_since: float = field(default_factory=time.monotonic)
+
+
+class LaneQueue:
+    """按会话分片的事件队列，同一会话内严格有序，不同会话之间并行
+
+    就绪通道按队首事件的调度类别加权公平调度，同一会话的事件仍按到达顺序处理
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        policy: OverflowPolicy = OverflowPolicy.BLOCK,
+        max_lanes: int = 1024,
+        idle_ttl: float = 60,
+        weights: dict[str, int] = None
+    ) -> None:
+        self.maxsize = maxsize
+        self.policy = OverflowPolicy(policy)
+        self.max_lanes = max_lanes
+        self.idle_ttl = idle_ttl
+        self.dropped = 0
+        self._size = 0
+        self._unfinished = 0
+        self._last_reclaim = time.monotonic()
+        self._lanes: dict[str, Lane] = {}
+        self.scheduler = WeightedScheduler(weights or {})
+        self._space = asyncio.Event()
+        self._finished = asyncio.Event()
+        self._finished.set()
+
+
+    def _lane_key(self, event: "MessageEvent") -> str:
+        """事件所属通道"""
+        return event.conversation_id or ""
+
+
+    def _has_space(self, key: str) -> bool:
+        """队列容量和通道数量是否允许该事件入队"""
+        if self.maxsize > 0 and self._size >= self.maxsize:
+            return False
+        if key in self._lanes or len(self._lanes) < self.max_lanes:
+            return True
+        self.reclaim(force=True)
+        return len(self._lanes) < self.max_lanes
+
+
+    async def put(self, event: "MessageEvent") -> bool:
+        """事件入队，返回事件是否被接收"""
+        key = self._lane_key(event)
+        if not self._has_space(key):
+            if self.policy == OverflowPolicy.BLOCK:
+                while not self._has_space(key):
+                    self._space.clear()
+                    await self._space.wait()
+            elif self.policy == OverflowPolicy.DROP_OLDEST and (lane := self._lanes.get(key)) and lane.events:
+                # 只丢弃同一会话中最旧的事件，避免影响其他会话
+                oldest = lane.events.popleft()
+                self._size -= 1
+                self._task_finished()
+                self.dropped += 1
+                logger.warning(f"会话 {key} 队列已满，丢弃旧事件 {oldest.event_type}")
+            else:
+                self.dropped += 1
+                logger.warning(f"事件队列已满，丢弃新事件 {event.event_type}")
+                return False
+
+        if (lane := self._lanes.get(key)) is None:
+            lane = self._lanes[key] = Lane(key=key)
+        lane.events.append(event)
+        self._size += 1
+        self._unfinished += 1
+        self._finished.clear()
+        self._schedule(lane)
+        return True
+
+
+    async def put_many(self, events: list["MessageEvent"]) -> int:
+        """批量入队，通道本身保证会话内顺序，返回被接收的事件数"""
+        accepted = 0
+        for event in events:
+            accepted += await self.put(event)
+        return accepted
+
+
+    async def get(self) -> EventBatch:
+        """取出一个就绪通道的队首事件，该通道在 task_done 之前不会再被调度"""
+        lane = await self.scheduler.get()
+        lane.scheduled = False
+        lane.active = True
+        self._size -= 1
+        self._space.set()
+        return (lane.events.popleft(), )
+
+
+    def task_done(self, batch: EventBatch) -> None:
+        """标记事件处理完成，释放其所在通道"""
+        if (lane := self._lanes.get(self._lane_key(batch[0]))) is not None:
+            lane.active = False
+            if lane.events:
+                self._schedule(lane)
+            else:
+                lane.idle_since = time.monotonic()
+                if self.idle_ttl <= 0:
+                    del self._lanes[lane.key]
+                # 空闲通道可被回收，唤醒等待通道的生产者
+                self._space.set()
+        self._task_finished()
+
+        if time.monotonic() - self._last_reclaim >= self.idle_ttl:
+            self.reclaim()
+
+
+    def reclaim(self, force: bool = False) -> int:
+        """回收空闲通道，force 为 True 时忽略空闲时长"""
+        now = time.monotonic()
+        self._last_reclaim = now
+        idle = [
+            key for key, lane in self._lanes.items()
+            if not lane.active and not lane.events
+            and (force or now - lane.idle_since >= self.idle_ttl)
+        ]
+        for key in idle:
+            del self._lanes[key]
+        if idle:
+            self._space.set()
+        return len(idle)
+
+
+    async def join(self) -> None:
+        """等待队列中的事件全部处理完成"""
+        await self._finished.wait()
+
+
+    def qsize(self) -> int:
+        """当前排队的事件数"""
+        return self._size
+
+
+    @property
+    def lane_count(self) -> int:
+        """当前存在的通道数"""
+        return len(self._lanes)
+
+
+    def _schedule(self, lane: Lane) -> None:
+        """将有事件且空闲的通道放入就绪队列"""
+        if lane.events and not lane.active and not lane.scheduled:
+            lane.scheduled = True
+            self.scheduler.put_nowait(event_class(lane.events[0].event_type), lane)
+
+
+    def _task_finished(self) -> None:
+        self._unfinished -= 1
+        if self._unfinished <= 0:
+            self._finished.set()
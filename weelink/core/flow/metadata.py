@@ -1,5 +1,6 @@
 # standard library
 import uuid
+import itertools
 from types import ModuleType
 from dataclasses import dataclass, field
 from typing import TYPE_CHECKING
@@ -42,8 +43,17 @@ class HandlerMetaData:
     """规则"""
     rule: "Rule" = field(compare=False)
 
+    """超时时间(秒)，为空时使用插件或全局配置"""
+    timeout: float = field(default=None, compare=False)
+
+    """已过期或一次性处理器已触发，等待时间轮移除"""
+    expired: bool = field(default=False, compare=False)
+
     """ID"""
-    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = field(default_factory=lambda: str(uuid.uuid4()), compare=False)
+
+    """创建序号，优先级相同时按注册顺序执行"""
+    seq: int = field(default_factory=itertools.count().__next__)
 
     def __repr__(self):
         return (f"<Subscriber id={self.id} module={self.module.__name__} "
@@ -0,0 +1,115 @@
+# standard library
+import heapq
+import asyncio
+from dataclasses import dataclass
+
+# local library
+from .metadata import HandlerMetaData
+from weelink.core.internal.config import conf
+
+
+@dataclass(frozen=True, slots=True)
+class DispatchEntry:
+    """预编译的处理器条目，分发时不再做任何反射判断"""
+
+    """处理器元信息"""
+    handler: HandlerMetaData
+
+    """回调方法"""
+    callback: callable
+
+    """回调是否为协程函数"""
+    is_coroutine: bool
+
+    """规则检查方法，规则为空时为None"""
+    rule_check: callable
+
+    """规则检查是否为协程函数"""
+    rule_is_coroutine: bool
+
+    """插件支持的适配器，为空表示支持全部"""
+    adapters: frozenset
+
+    """阻塞检查"""
+    block: bool
+
+    """超时时间(秒)，为空表示不限时"""
+    timeout: float
+
+    """路由键，事件至少命中其中一个时才参与分发，为空表示总是参与"""
+    routes: frozenset = None
+
+
+"""按优先级排好序的不可变分发计划"""
+DispatchPlan = tuple[DispatchEntry, ...]
+
+"""并发执行组，组内处理器可同时执行，组与组之间顺序执行"""
+DispatchGroups = tuple[DispatchPlan, ...]
+
+
+def compile_entry(handler: HandlerMetaData) -> DispatchEntry:
+    """将处理器编译为分发条目"""
+    rule = handler.rule
+    if rule is None or not rule.checkers:
+        rule_check = None
+    else:
+        rule_check = rule.check_async if rule.is_async else rule.check
+    return DispatchEntry(
+        handler=handler,
+        callback=handler.callback,
+        is_coroutine=asyncio.iscoroutinefunction(handler.callback),
+        rule_check=rule_check,
+        rule_is_coroutine=rule_check is not None and asyncio.iscoroutinefunction(rule_check),
+        adapters=frozenset(handler.plugin.adapters or ()),
+        block=handler.block,
+        timeout=handler.timeout or handler.plugin.timeout or conf.HANDLER_TIMEOUT or None,
+        routes=rule.routes if rule is not None else None
+    )
+
+
+def compile_plan(handlers: list[HandlerMetaData]) -> DispatchPlan:
+    """编译分发计划，未绑定插件的处理器不参与分发"""
+    return tuple(
+        compile_entry(handler)
+        for handler in sorted(handlers)
+        if handler.plugin is not None and not handler.expired
+    )
+
+
+def route_plan(plan: DispatchPlan) -> tuple[DispatchPlan, dict[tuple, DispatchPlan]]:
+    """拆分出总是参与分发的计划，以及按路由键索引的候选计划"""
+    routes: dict[tuple, list[DispatchEntry]] = {}
+    for entry in plan:
+        for key in entry.routes or ():
+            routes.setdefault(key, []).append(entry)
+    unrouted = tuple(entry for entry in plan if entry.routes is None)
+    return unrouted, {key: tuple(entries) for key, entries in routes.items()}
+
+
+def merge_plans(*plans: DispatchPlan) -> DispatchPlan:
+    """按处理器优先级合并多个已排序的分发计划，同一条目只保留一次"""
+    merged = []
+    for entry in heapq.merge(*plans, key=lambda entry: entry.handler):
+        if not merged or merged[-1] is not entry:
+            merged.append(entry)
+    return tuple(merged)
+
+
+def group_plan(plan: DispatchPlan) -> DispatchGroups:
+    """将分发计划切分为并发执行组
+
+    连续的非阻塞处理器归为同一组并发执行，阻塞处理器单独成组，
+    保证阻塞处理器仍在所有更高优先级处理器完成后执行
+    """
+    groups, current = [], []
+    for entry in plan:
+        if entry.block:
+            if current:
+                groups.append(tuple(current))
+                current = []
+            groups.append((entry, ))
+        else:
+            current.append(entry)
+    if current:
+        groups.append(tuple(current))
+    return tuple(groups)
@@ -0,0 +1,124 @@
+# standard library
+import asyncio
+from enum import Enum
+from collections import defaultdict
+from typing import TYPE_CHECKING
+
+# local library
+from .event import event_class
+from .scheduler import WeightedScheduler
+from weelink.core.utils import logger
+
+if TYPE_CHECKING:
+    from weelink.core.message import MessageEvent
+
+
+class OverflowPolicy(str, Enum):
+    """队列已满时的处理策略"""
+    BLOCK = "block"
+    DROP_NEW = "drop_new"
+    DROP_OLDEST = "drop_oldest"
+
+
+"""同一会话的一组事件，由一个 worker 按顺序处理"""
+EventBatch = tuple["MessageEvent", ...]
+
+
+class DispatchQueue:
+    """有界事件队列，按事件类别加权调度，队列满时根据策略施加背压或丢弃事件
+
+    容量按事件数计算，批量入队的一组事件只要在入队时队列未满即整体接收，
+    因此排队事件数最多超出上限一组
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        policy: OverflowPolicy = OverflowPolicy.BLOCK,
+        weights: dict[str, int] = None
+    ) -> None:
+        self.maxsize = maxsize
+        self.policy = OverflowPolicy(policy)
+        self.dropped = 0
+        self._size = 0
+        self.scheduler = WeightedScheduler(weights or {})
+        self._unfinished = 0
+        self._space = asyncio.Event()
+        self._finished = asyncio.Event()
+        self._finished.set()
+
+
+    async def put(self, event: "MessageEvent") -> bool:
+        """事件入队，返回事件是否被接收"""
+        return await self._put((event, ))
+
+
+    async def put_many(self, events: list["MessageEvent"]) -> int:
+        """批量入队，同一会话的事件合并为一组以保证顺序，返回被接收的事件数"""
+        batches: dict[str, list["MessageEvent"]] = defaultdict(list)
+        for event in events:
+            batches[event.conversation_id].append(event)
+
+        accepted = 0
+        for batch in batches.values():
+            if await self._put(tuple(batch)):
+                accepted += len(batch)
+        return accepted
+
+
+    async def _put(self, batch: EventBatch) -> bool:
+        if self._full():
+            if self.policy == OverflowPolicy.BLOCK:
+                while self._full():
+                    self._space.clear()
+                    await self._space.wait()
+            elif self.policy == OverflowPolicy.DROP_NEW:
+                self.dropped += len(batch)
+                logger.warning(f"事件队列已满，丢弃 {len(batch)} 个新事件")
+                return False
+            else:
+                # DROP_OLDEST: 优先丢弃权重最低类别中最旧的事件
+                oldest = self.scheduler.pop_lowest()
+                self._size -= len(oldest)
+                self._task_finished()
+                self.dropped += len(oldest)
+                logger.warning(f"事件队列已满，丢弃 {len(oldest)} 个旧事件")
+
+        self.scheduler.put_nowait(event_class(batch[0].event_type), batch)
+        self._size += len(batch)
+        self._unfinished += 1
+        self._finished.clear()
+        return True
+
+
+    async def get(self) -> EventBatch:
+        """按类别权重取出一组事件，一组事件的类别取决于其首个事件"""
+        batch = await self.scheduler.get()
+        self._size -= len(batch)
+        self._space.set()
+        return batch
+
+
+    def task_done(self, batch: EventBatch) -> None:
+        """标记一组事件处理完成"""
+        self._task_finished()
+
+
+    async def join(self) -> None:
+        """等待队列中的事件全部处理完成"""
+        await self._finished.wait()
+
+
+    def qsize(self) -> int:
+        """当前排队的事件数"""
+        return self._size
+
+
+    def _full(self) -> bool:
+        return 0 < self.maxsize <= self._size
+
+
+    def _task_finished(self) -> None:
+        self._unfinished -= 1
+        if self._unfinished <= 0:
+            self._finished.set()
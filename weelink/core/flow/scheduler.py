@@ -0,0 +1,78 @@
+# standard library
+import asyncio
+from collections import Counter, deque
+
+# local library
+from .event import EventClass
+
+
+class WeightedScheduler:
+    """按事件类别加权公平调度的就绪队列(平滑加权轮询)
+
+    每个类别一个 FIFO 队列，取出时只在非空类别之间轮询，
+    低权重类别的积压不会阻塞高权重类别
+    """
+
+    def __init__(self, weights: dict[str, int]) -> None:
+        self.weights: dict[EventClass, int] = {
+            EventClass(name): max(1, int(weight)) for name, weight in weights.items()
+        }
+        for cls in EventClass:
+            self.weights.setdefault(cls, 1)
+        self.served: Counter = Counter()
+        self._queues: dict[EventClass, deque] = {cls: deque() for cls in self.weights}
+        self._current: dict[EventClass, int] = dict.fromkeys(self.weights, 0)
+        self._size = 0
+        self._not_empty = asyncio.Event()
+
+
+    def put_nowait(self, cls: EventClass, item: any) -> None:
+        """放入指定类别的队尾"""
+        self._queues[cls].append(item)
+        self._size += 1
+        self._not_empty.set()
+
+
+    async def get(self) -> any:
+        """按权重取出一个元素"""
+        while not self._size:
+            self._not_empty.clear()
+            await self._not_empty.wait()
+
+        cls = self._pick()
+        self._size -= 1
+        self.served[cls] += 1
+        return self._queues[cls].popleft()
+
+
+    def pop_lowest(self) -> any:
+        """从权重最低的非空类别中取出最旧的元素，用于过载时丢弃"""
+        for cls in sorted(self._queues, key=self.weights.__getitem__):
+            if self._queues[cls]:
+                self._size -= 1
+                return self._queues[cls].popleft()
+        return None
+
+
+    def qsize(self) -> int:
+        return self._size
+
+
+    def class_sizes(self) -> dict[str, int]:
+        """各类别的排队数量"""
+        return {cls.value: len(queue) for cls, queue in self._queues.items()}
+
+
+    def _pick(self) -> EventClass:
+        """平滑加权轮询：只在非空类别之间分配"""
+        total, best = 0, None
+        for cls, queue in self._queues.items():
+            if not queue:
+                continue
+            weight = self.weights[cls]
+            self._current[cls] += weight
+            total += weight
+            if best is None or self._current[cls] > self._current[best]:
+                best = cls
+        self._current[best] -= total
+        return best
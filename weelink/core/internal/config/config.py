@@ -26,6 +26,8 @@ class WeelinkConfig(dict):
         with open(WEELINK_CONFIG_PATH, "r") as f:
             conf = json.loads(f.read())
         
+        # 旧配置文件可能缺少新增的配置项，使用默认值补全
+        self.update(default_config)
         self.update(conf)
 
 
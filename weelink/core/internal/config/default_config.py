@@ -28,6 +28,70 @@ DEFAULT_CONFIG = {
     "BACKEND_CORS_HEADERS": [
         "*"
     ],
+    # Broker
+    "BROKER_MODE": "task",
+    "BROKER_WORKERS": 16,
+    "BROKER_QUEUE_SIZE": 1000,
+    "BROKER_OVERFLOW_POLICY": "block",
+    "BROKER_MAX_LANES": 1024,
+    "BROKER_LANE_IDLE_TTL": 60,
+    "BROKER_CLASS_WEIGHTS": {
+        "system": 8,
+        "message": 4,
+        "media": 1
+    },
+    "BROKER_CONCURRENT_HANDLERS": False,
+    # Admission: 事件延迟超过 ADMISSION_MAX_LAG 秒时按类别或 EventType 名称处理，为 0 时不启用
+    # 可选 process / degrade(使用 HANDLER_DEGRADED_TIMEOUT) / skip
+    "ADMISSION_MAX_LAG": 0,
+    "ADMISSION_POLICIES": {
+        "system": "process",
+        "message": "skip",
+        "media": "degrade"
+    },
+    # Handler: 全局默认超时，为 0 时不限制；插件或 @on(timeout=...) 可单独设置
+    "HANDLER_TIMEOUT": 0,
+    "HANDLER_DEGRADED_TIMEOUT": 10,
+    # Regex: 超过长度的文本不做正则匹配；安装 regex 时单次匹配以预算为超时，
+    # 超出预算的次数达到上限后停用该正则 REGEX_TRIP_COOLDOWN 秒
+    "REGEX_MAX_TEXT_LENGTH": 4096,
+    "REGEX_TIME_BUDGET": 0.05,
+    "REGEX_MAX_STRIKES": 3,
+    "REGEX_TRIP_COOLDOWN": 300,
+    # Rule: 声明了 ttl 的检查器按 (检查器, 发送者, 会话) 跨事件缓存结果
+    "RULE_CACHE_SIZE": 10000,
+    # RateLimit: 每级为 [每秒令牌数, 桶容量]，令牌数为 0 表示不限制；后端可选 local / redis
+    "RATE_LIMIT_BACKEND": "local",
+    "RATE_LIMIT_SENDER": [1, 5],
+    "RATE_LIMIT_CONVERSATION": [5, 20],
+    "RATE_LIMIT_GLOBAL": [50, 200],
+    "RATE_LIMIT_MAX_KEYS": 10000,
+    # Dedupe: 按消息ID去重，后端可选 local / redis；LRU 之外由布隆过滤器覆盖，
+    # 每条新消息约有 2 * DEDUPE_ERROR_RATE 的概率被误判为重复
+    "DEDUPE_BACKEND": "local",
+    "DEDUPE_CAPACITY": 100000,
+    "DEDUPE_LRU_SIZE": 20000,
+    "DEDUPE_TTL": 600,
+    "DEDUPE_ERROR_RATE": 1e-5,
+    # Flood: 窗口为 FLOOD_WINDOW 个 1 秒的桶，刷屏期间按类别或 EventType 名称处理，可选 process / degrade / skip
+    "FLOOD_WINDOW": 10,
+    "FLOOD_SENDER_RATE": 5,
+    "FLOOD_CONVERSATION_FACTOR": 10,
+    "FLOOD_CONVERSATION_MIN_RATE": 10,
+    "FLOOD_COOLDOWN": 30,
+    "FLOOD_MAX_KEYS": 10000,
+    "FLOOD_POLICIES": {
+        "message": "degrade",
+        "media": "skip"
+    },
+    # Session: 多轮对话状态，闲置 SESSION_TTL 秒后过期；后端为 redis 时写穿到 Redis
+    "SESSION_BACKEND": "local",
+    "SESSION_TTL": 600,
+    "SESSION_MAX_ENTRIES": 10000,
+    "SESSION_MAX_BYTES": 64 * 1024 * 1024,
+    # Middleware: 各中间件分阶段耗时统计，整条链超过 MIDDLEWARE_SLOW_CHAIN 秒时输出各中间件耗时
+    "MIDDLEWARE_TIMING": True,
+    "MIDDLEWARE_SLOW_CHAIN": 0.5,
     # Internal
     "inactive_plugins": []
 }
@@ -6,7 +6,7 @@ import asyncio
 from weelink.core.plugin import PluginManager
 from weelink.core.adapter import AdapterManager
 from weelink.core.utils import logger, print_exc
-from weelink.core.middleware import MiddlewareManager
+from weelink.core.middleware import MiddlewareManager, BUILTIN_MIDDLEWARES
 from weelink.core.flow import get_broker, EventType
 from weelink.core.on import HandleRegistry
 
@@ -19,12 +19,16 @@ class Linkhub:
         self.plugin = PluginManager()
         self.adapter = AdapterManager()
         self.middleware_manager = MiddlewareManager()
+        for middleware in BUILTIN_MIDDLEWARES:
+            self.middleware_manager.add_middleware(middleware())
 
 
     async def preload(self) -> None:
         """Linkhub预加载"""
         try:
             self.broker.set_middleware_manager(self.middleware_manager)
+            self.broker.start()
+            HandleRegistry.expiry.start()
             
             from weelink.core.internal.db import mongodb
             from weelink.core.utils import redis, schedule       
@@ -69,6 +73,7 @@ class Linkhub:
                 self.task.cancel()
             
             await self.broker.wait_for_completion()
+            await HandleRegistry.expiry.stop()
             
             from weelink.core.internal.db import mongodb
             from weelink.core.utils import redis, schedule
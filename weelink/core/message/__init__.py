@@ -1,6 +1,6 @@
 from .model import *
 from .component import (
     MessageComponent, Text, File, Emoji, Forward, 
-    Link, Quote
+    Link, Quote, MENTION_PATTERN, strip_mentions
 )
 from .event import MessageEvent, MessageSource
\ No newline at end of file
@@ -1,12 +1,26 @@
 # standard library
+import re
 from pathlib import Path
 from enum import Enum, auto
+from functools import cached_property
 from dataclasses import dataclass
 
 # local library
 from weelink.core.message import AddMsgType
 
 
+"""@消息：@昵称 + 特殊空格(\u2005)"""
+MENTION_PATTERN = re.compile(r'@[^\u2005]*\u2005')
+
+"""全角字符(！～ 与全角空格)到半角的映射"""
+_HALFWIDTH = {code: code - 0xFEE0 for code in range(0xFF01, 0xFF5F)} | {0x3000: 0x20}
+
+
+def strip_mentions(text: str) -> str:
+    """去掉文本中的@信息"""
+    return MENTION_PATTERN.sub('', text) if '\u2005' in text else text
+
+
 @dataclass
 class MessageComponent:
     
@@ -42,6 +56,28 @@ class Text(AddMessage):
     
     """处理后的消息文本"""
     text: str
+    
+    # 以下规范化视图首次访问时计算，同一消息的所有检查器和插件共享
+    
+    @cached_property
+    def casefolded(self) -> str:
+        """大小写折叠后的文本"""
+        return self.text.casefold()
+    
+    @cached_property
+    def halfwidth(self) -> str:
+        """全角字符转为半角后的文本"""
+        return self.text.translate(_HALFWIDTH)
+    
+    @cached_property
+    def collapsed(self) -> str:
+        """连续空白合并为单个空格并去掉首尾空白后的文本"""
+        return " ".join(self.text.split())
+    
+    @cached_property
+    def normalized(self) -> str:
+        """在半角视图上合并空白并大小写折叠后的文本，适合宽松匹配(@信息已由适配器去掉)"""
+        return " ".join(self.halfwidth.split()).casefold()
 
 
 @dataclass
@@ -100,6 +136,8 @@ class Forward(AddMessage):
 
 
 __all__ = [
+    "MENTION_PATTERN",
+    "strip_mentions",
     "MessageComponent",
     "Text",
     "File",
@@ -1,5 +1,7 @@
 # standard library
+import re
 import uuid
+from typing import TYPE_CHECKING
 from enum import Enum, auto
 from dataclasses import dataclass, field
 # local library
@@ -8,6 +10,10 @@ from .model import Chatroom, ChatroomMember, Friend
 from weelink.core.flow.event import EventType
 from weelink.core.adapter import Adapter, AdapterMetaData
 
+if TYPE_CHECKING:
+    from weelink.core.on.matcher import CommandMatch
+    from weelink.core.middleware import Session
+
 
 
 class MessageSource(Enum):
@@ -49,8 +55,34 @@ class MessageEvent:
     """AT对象"""
     ats: list[ChatroomMember] = field(default_factory=list)
     
+    """是否降级处理(如积压时跳过耗时操作)"""
+    degraded: bool = False
+    
+    """命令路由解析出的命令与参数，未匹配任何命令时为 None"""
+    command: "CommandMatch" = None
+    
+    """正则规则的匹配结果，(pattern, flags) - Match，同一正则使用不同 flags 时结果各自独立"""
+    matches: dict[tuple[str, int], re.Match] = field(default_factory=dict, repr=False, compare=False)
+    
+    """(会话, 发送者) 的多轮对话状态，由会话中间件附加，未启用时为 None"""
+    session: "Session" = field(default=None, repr=False, compare=False)
+    
+    """分发期间的缓存(如关键词匹配结果)，同一事件的多个处理器共享"""
+    memo: dict = field(default_factory=dict, repr=False, compare=False)
+    
     """消息ID"""
     id: str = str(uuid.uuid4())
     
+    @property
+    def conversation_id(self) -> str:
+        """会话ID，群聊为chatroom_id，私聊为wxid"""
+        if isinstance(self.conversation, Chatroom):
+            return self.conversation.chatroom_id
+        return getattr(self.conversation, "wxid", None)
+    
+    def get_match(self, pattern: str, flags: int = 0) -> re.Match | None:
+        """返回正则规则的匹配结果，flags 需与规则声明时一致"""
+        return self.matches.get((pattern, flags))
+    
     def __repr__(self) -> str:
         return f"MessageEvent(id={self.id}, event_type={self.event_type}, adapter={self.adapter_obj.__class__.__name__})"
\ No newline at end of file
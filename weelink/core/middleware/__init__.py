@@ -4,7 +4,8 @@ from .base import Middleware
 # 导入所有中间件源
 from .sources import *
 
-__all__ = ["MiddlewareManager", "Middleware"]
+__all__ = ["MiddlewareManager", "Middleware", "BUILTIN_MIDDLEWARES",
+           "DedupeMiddleware", "FloodMiddleware", "RateLimitMiddleware", "SessionMiddleware", "Session"]
 
 
 
@@ -1,14 +1,22 @@
 # standard library
 import abc
+from typing import Iterable
 
 # local library
 from weelink.core.utils import logger, Context
 from weelink.core.message import MessageEvent
+from weelink.core.flow.event import EventType
 
 
 class Middleware():
     """中间件基类"""
     
+    """适用的事件类型，为空表示全部，其余事件类型的中间件链中不包含该中间件"""
+    event_types: Iterable[EventType] = None
+    
+    """启用状态变化时的回调，由中间件管理器设置"""
+    _on_change: callable = None
+    
     def __init__(self) -> None:
         self.enabled = True
     
@@ -27,16 +35,26 @@ class Middleware():
     
     
     async def on_error(self, event: MessageEvent, context: Context, err: Exception) -> bool:
-        raise NotImplementedError
+        """返回 True 表示错误已处理，默认交由中间件链继续抛出"""
+        return False
+    
+    
+    def stats(self) -> dict:
+        """运行统计，展示在中间件列表中"""
+        return {}
     
     
     def enable(self) -> None:
         """启用中间件"""
         self.enabled = True
+        if self._on_change is not None:
+            self._on_change()
         logger.info(f"中间件 {self.name} 已启用")
     
     
     def disable(self) -> None:
         """禁用中间件"""
         self.enabled = False
+        if self._on_change is not None:
+            self._on_change()
         logger.info(f"中间件 {self.name} 已停止")
\ No newline at end of file
@@ -1,15 +1,24 @@
 # standard library
 import json
+import time
 import datetime
+import functools
 from pathlib import Path
 
 
 # local library
 from .base import Middleware
+from .timing import MiddlewareTiming
 from weelink.core.message import MessageEvent
+from weelink.core.flow.event import EventType
+from weelink.core.internal.config import conf
 from weelink.core.utils import logger, DATA_DIR, Context
 
 
+"""预编译的中间件链，接收事件和上下文，返回处理后的事件，返回 None 表示事件被过滤"""
+MiddlewareChain = callable
+
+
 class MiddlewareManager:
     """中间件管理器 - 负责中间件的注册、执行和生命周期管理"""
     
@@ -18,6 +27,13 @@ class MiddlewareManager:
         self._middleware_map: dict[str, Middleware] = {}
         self._global_context = Context()
         
+        # EventType - 预编译的中间件链，中间件增删或启停时整体失效
+        self._chains: dict[EventType, MiddlewareChain] = {}
+        
+        # 耗时统计，关闭时构建不计时的链，没有额外开销
+        self.timing_enabled: bool = conf.MIDDLEWARE_TIMING
+        self._timings: dict[str, MiddlewareTiming] = {}
+        
         # 配置文件管理
         self._config_file = config_file or DATA_DIR / "middleware_config.json"
         self._config_data = self.import_config()
@@ -28,7 +44,7 @@ class MiddlewareManager:
         if self._config_file.exists():
             try:
                 with open(self._config_file) as f:
-                    return json.loads(f)
+                    return json.load(f)
             except Exception as e:
                 logger.error(f"中间件配置文件读取失败: {str(e)}")
         
@@ -42,7 +58,7 @@ class MiddlewareManager:
         """保存配置项"""
 
         try:
-            self._config_data["last_updated"] = datetime.now().isoformate()
+            self._config_data["last_updated"] = datetime.datetime.now().isoformat()
             self._config_file.parent.mkdir(parents=True, exist_ok=True)
             with open(self._config_file, "w", encoding='utf-8') as f:
                 json.dump(self._config_data, f, indent=4, ensure_ascii=False)
@@ -59,6 +75,7 @@ class MiddlewareManager:
         
         for middleware in self._middlewares:
             middleware.enable()
+        self._invalidate()
     
     
     def add_middleware(self, middleware: Middleware) -> None:
@@ -68,21 +85,28 @@ class MiddlewareManager:
         
         self._middlewares.append(middleware)
         self._middleware_map[middleware.name] = middleware
+        self._timings[middleware.name] = MiddlewareTiming()
+        middleware._on_change = self._invalidate
     
         # 配置文件中恢复上次状态
         enabled_mws = self._config_data["enabled_middlewares"]
-        middleware.enabled = middleware in enabled_mws
+        middleware.enabled = middleware.name in enabled_mws
             
-        self._middlewares.sort(key=lambda x: (x.priority, self._middlewares.index(x)))
+        # 排序是稳定的，同优先级保持添加顺序
+        self._middlewares.sort(key=lambda x: x.priority)
+        self._invalidate()
     
     
     def remove_middleware(self, name: str) -> None:
         """移除指定名称的中间件"""
         if name not in self._middleware_map:
-            logger.warning(f"中间件 {name} 未找到")
+            return logger.warning(f"中间件 {name} 未找到")
         
         middleware = self._middleware_map.pop(name)
         self._middlewares.remove(middleware)
+        self._timings.pop(name, None)
+        middleware._on_change = None
+        self._invalidate()
     
     
     def get_middleware(self, name: str) -> Middleware:
@@ -97,7 +121,10 @@ class MiddlewareManager:
                 'name': mw.name,
                 'priority': mw.priority,
                 'enabled': mw.enabled,
-                'class_name': mw.__class__.__name__
+                'event_types': [event_type.name for event_type in mw.event_types or ()],
+                'class_name': mw.__class__.__name__,
+                'stats': mw.stats(),
+                'timing': self._timings[mw.name].to_dict() if self.timing_enabled else None
             }
             for mw in self._middlewares
         ]
@@ -108,7 +135,8 @@ class MiddlewareManager:
         middleware = self.get_middleware(name)
         if middleware:
             middleware.enable()
-            self._config_data["enabled_middlewares"].append(middleware)
+            if name not in self._config_data["enabled_middlewares"]:
+                self._config_data["enabled_middlewares"].append(name)
     
     
     def disable_middleware(self, name: str) -> bool:
@@ -116,35 +144,65 @@ class MiddlewareManager:
         middleware = self.get_middleware(name)
         if middleware:
             middleware.disable()
-            self._config_data["enabled_middlewares"].remove(middleware)
+            if name in self._config_data["enabled_middlewares"]:
+                self._config_data["enabled_middlewares"].remove(name)
+    
+    
+    def set_timing(self, enabled: bool) -> None:
+        """开启或关闭耗时统计"""
+        self.timing_enabled = enabled
+        self._invalidate()
+    
+    
+    def reset_timing(self) -> None:
+        """清空耗时统计"""
+        for timing in self._timings.values():
+            timing.reset()
     
     
     async def process(self, event: MessageEvent) -> any:
-        """处理事件，依次通过所有启用的中间件"""
+        """处理事件，依次通过该事件类型的中间件链"""
         try:
-            # 创建中间件执行链
+            chain = self._chains.get(event.event_type) or self._compile_chain(event.event_type)
+            if not self.timing_enabled:
+                return await chain(event, Context())
+            
             context = Context()
-            return await self._create_middleware_chain(event, context)           
+            context.set("middleware_trace", [])
+            start = time.perf_counter()
+            result = await chain(event, context)
+            if (elapsed := time.perf_counter() - start) > conf.MIDDLEWARE_SLOW_CHAIN:
+                trace = ", ".join(f"{name} {cost * 1e3:.2f}ms" for name, cost in context.get("middleware_trace"))
+                logger.warning(f"中间件链耗时 {elapsed * 1e3:.2f}ms ({event.event_type}): {trace}")
+            return result
         except Exception as e:
             logger.error(f"中间件链执行错误，请检查日志文件")
     
     
-    async def _create_middleware_chain(self, 
-            event: MessageEvent, context: Context, index: int = 0
-    ) -> any:
-        """递归创建中间件执行链"""
-        enabled_middlewares = self._get_enabled_middlewares()
+    def _compile_chain(self, event_type: EventType) -> MiddlewareChain:
+        """从后往前逐层包装，构建该事件类型的中间件链"""
+        async def terminal(event: MessageEvent, context: Context) -> MessageEvent:
+            return event
         
-        # 如果已经处理完所有中间件，返回None
-        if index >= len(enabled_middlewares):
-            return None
-        
-        middleware = enabled_middlewares[index]
-        
-        async def next_middleware():
-            return await self._create_middleware_chain(event, context, index + 1)
-        
-        return await self._execute_middleware(middleware, event, context, next_middleware)
+        chain = terminal
+        for middleware in reversed(self._get_enabled_middlewares(event_type)):
+            chain = self._link(middleware, chain)
+        self._chains[event_type] = chain
+        return chain
+    
+    
+    def _link(self, middleware: Middleware, next_chain: MiddlewareChain) -> MiddlewareChain:
+        execute = self._execute_timed if self.timing_enabled else self._execute_middleware
+        async def chain(event: MessageEvent, context: Context) -> any:
+            return await execute(
+                middleware, event, context, functools.partial(next_chain, event, context)
+            )
+        return chain
+    
+    
+    def _invalidate(self) -> None:
+        """中间件增删或启停后，各事件类型的链在下次使用时重新构建"""
+        self._chains.clear()
     
     
     async def _execute_middleware(
@@ -175,6 +233,53 @@ class MiddlewareManager:
                 raise
     
     
-    def _get_enabled_middlewares(self) -> list[Middleware]:
-        """获取所有启用的中间件列表"""
-        return [mw for mw in self._middlewares if mw.enabled]
+    async def _execute_timed(
+        self, 
+        middleware: Middleware, 
+        event: MessageEvent, 
+        context: Context,
+        next_middleware: callable
+    ) -> any:
+        """执行单个中间件并记录各阶段耗时，自身耗时扣除了下游中间件的耗时"""
+        timing = self._timings[middleware.name]
+        downstream = 0.0
+        
+        async def timed_next() -> any:
+            nonlocal downstream
+            start = time.perf_counter()
+            try:
+                return await next_middleware()
+            finally:
+                downstream += time.perf_counter() - start
+        
+        try:
+            start = time.perf_counter()
+            await middleware.before_process(event, context)
+            process_start = time.perf_counter()
+            timing.before.record(process_start - start)
+            
+            result = await middleware.process(event, context, timed_next)
+            after_start = time.perf_counter()
+            elapsed = after_start - process_start
+            timing.process.record(elapsed)
+            timing.self.record(elapsed - downstream)
+            context.get("middleware_trace", []).append((middleware.name, elapsed - downstream))
+            
+            await middleware.after_process(event, context, result)
+            timing.after.record(time.perf_counter() - after_start)
+            
+            return result
+        except Exception as e:
+            handled = await middleware.on_error(event, context, e)
+            if handled:
+                return logger.debug(f"由中间件处理的错误 {middleware.name}")
+            else:
+                raise
+    
+    
+    def _get_enabled_middlewares(self, event_type: EventType = None) -> list[Middleware]:
+        """获取所有启用的中间件列表，指定事件类型时只返回适用于该类型的"""
+        return [
+            mw for mw in self._middlewares
+            if mw.enabled and (event_type is None or not mw.event_types or event_type in mw.event_types)
+        ]
@@ -1 +1,10 @@
+from .rate_limit import RateLimitMiddleware, LocalBucketBackend, RedisBucketBackend
+from .dedupe import DedupeMiddleware
+from .flood import FloodMiddleware, SlidingWindows
+from .session import SessionMiddleware, SessionStore, Session
 
+"""内置中间件，Linkhub 初始化时添加，启用状态由中间件配置决定"""
+BUILTIN_MIDDLEWARES = [DedupeMiddleware, FloodMiddleware, RateLimitMiddleware, SessionMiddleware]
+
+__all__ = ["DedupeMiddleware", "FloodMiddleware", "SlidingWindows", "RateLimitMiddleware", "LocalBucketBackend", "RedisBucketBackend",
+           "SessionMiddleware", "SessionStore", "Session", "BUILTIN_MIDDLEWARES"]
@@ -0,0 +1,43 @@
+# standard library
+
+# local library
+from ..base import Middleware
+from weelink.core.message import MessageEvent
+from weelink.core.message.component import AddMessage
+from weelink.core.flow.event import NON_SYSTEM_EVENTS
+from weelink.core.utils import logger, Context, create_deduplicator
+
+
+class DedupeMiddleware(Middleware):
+    """按消息ID丢弃重复事件
+
+    用于没有去重阶段的适配器，适配器实例带有 deduplicator 的(如 WechatPad855)
+    已在转换前去重，直接跳过。优先级最高，重复事件不会消耗限流配额
+    """
+
+    name = "dedupe"
+
+    priority = 5
+
+    """只有携带消息ID的消息事件需要去重"""
+    event_types = NON_SYSTEM_EVENTS
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.deduplicator = create_deduplicator("middleware")
+
+
+    async def process(self, event: MessageEvent, context: Context, next_middleware: callable) -> any:
+        component = event.component
+        # 适配器已在转换前去重的事件不再重复检查
+        if isinstance(component, AddMessage) and getattr(event.adapter_obj, "deduplicator", None) is None:
+            msg_id = component.new_msg_id or component.msg_id
+            key = f"{getattr(event.adapter_obj, 'wxid', '')}:{msg_id}"
+            if await self.deduplicator.seen(key):
+                logger.debug(f"重复消息 {msg_id} 已丢弃")
+                return None
+        return await next_middleware()
+
+
+    def stats(self) -> dict:
+        return self.deduplicator.stats()
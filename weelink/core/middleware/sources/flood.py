@@ -0,0 +1,205 @@
+# standard library
+import time
+from array import array
+from collections import Counter, OrderedDict
+
+# local library
+from ..base import Middleware
+from weelink.core.message import MessageEvent
+from weelink.core.flow.event import EventType, NON_SYSTEM_EVENTS
+from weelink.core.flow.admission import AdmissionPolicy, resolve_policies
+from weelink.core.internal.config import conf
+from weelink.core.utils import logger, Context
+from weelink.core.utils.sse import sse_manager
+
+
+class SlidingWindows:
+    """定长数组实现的环形滑动窗口计数，每个 key 占一段连续的桶
+
+    桶记录所属的时间片编号，过期的桶在下次写入时清零，无需定时清理。
+    key 数超过上限时复用最久未活跃 key 的槽位
+    """
+
+    def __init__(self, max_keys: int, buckets: int, width: float = 1.0) -> None:
+        self.max_keys = max_keys
+        self.buckets = buckets
+        self.width = width
+        self._counts = array("I", [0]) * (max_keys * buckets)
+        self._ticks = array("q", [-1]) * (max_keys * buckets)
+        """ key - 槽位 """
+        self._slots: OrderedDict[str, int] = OrderedDict()
+
+
+    def hit(self, key: str, now: float) -> float:
+        """记录一次并返回最近一个桶宽内的速率(次/秒)，上一个桶按剩余比例计入"""
+        base = self._slot(key) * self.buckets
+        position = now / self.width
+        tick = int(position)
+        index = base + tick % self.buckets
+        if self._ticks[index] != tick:
+            self._ticks[index] = tick
+            self._counts[index] = 0
+        self._counts[index] += 1
+        previous = base + (tick - 1) % self.buckets
+        weight = 1 - (position - tick)
+        count = self._counts[index]
+        if self._ticks[previous] == tick - 1:
+            count += self._counts[previous] * weight
+        return count / self.width
+
+
+    def baseline(self, key: str, now: float) -> float:
+        """窗口内除当前桶以外的平均速率(次/秒)"""
+        if (slot := self._slots.get(key)) is None:
+            return 0.0
+        base = slot * self.buckets
+        tick = int(now / self.width)
+        total = 0
+        for offset in range(1, self.buckets):
+            index = base + (tick - offset) % self.buckets
+            if self._ticks[index] == tick - offset:
+                total += self._counts[index]
+        return total / ((self.buckets - 1) * self.width)
+
+
+    def nbytes(self) -> int:
+        return self._counts.itemsize * len(self._counts) + self._ticks.itemsize * len(self._ticks)
+
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+
+    def _slot(self, key: str) -> int:
+        if (slot := self._slots.get(key)) is not None:
+            self._slots.move_to_end(key)
+            return slot
+        if len(self._slots) < self.max_keys:
+            slot = len(self._slots)
+        else:
+            _, slot = self._slots.popitem(last=False)
+            base = slot * self.buckets
+            self._ticks[base:base + self.buckets] = array("q", [-1]) * self.buckets
+        self._slots[key] = slot
+        return slot
+
+
+class FloodMiddleware(Middleware):
+    """检测刷屏并临时降级处理
+
+    单个发送者速率超过 FLOOD_SENDER_RATE，或会话速率超过自身基线的
+    FLOOD_CONVERSATION_FACTOR 倍(且不低于 FLOOD_CONVERSATION_MIN_RATE)时，
+    该发送者或会话在 FLOOD_COOLDOWN 秒内按 FLOOD_POLICIES 处理：
+    skip 丢弃事件，degrade 标记 event.degraded。刷屏开始时推送 SSE flood 事件
+    """
+
+    name = "flood"
+
+    priority = 8
+
+    """系统事件不参与统计"""
+    event_types = NON_SYSTEM_EVENTS
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.senders = SlidingWindows(conf.FLOOD_MAX_KEYS, conf.FLOOD_WINDOW)
+        self.conversations = SlidingWindows(conf.FLOOD_MAX_KEYS, conf.FLOOD_WINDOW)
+        self.sender_rate = conf.FLOOD_SENDER_RATE
+        self.conversation_factor = conf.FLOOD_CONVERSATION_FACTOR
+        self.conversation_min_rate = conf.FLOOD_CONVERSATION_MIN_RATE
+        self.cooldown = conf.FLOOD_COOLDOWN
+        self.max_flooded = conf.FLOOD_MAX_KEYS
+        self._policies: dict[EventType, AdmissionPolicy] = resolve_policies(
+            conf.FLOOD_POLICIES, AdmissionPolicy.DEGRADE
+        )
+
+        """ (范围, key) - 降级截止时间(monotonic)，冷却时间固定，按插入顺序即按截止时间排列 """
+        self.flooded: dict[tuple[str, str], float] = {}
+        self.detected: Counter = Counter()
+        self.shed: Counter = Counter()
+        self.degraded: Counter = Counter()
+
+
+    async def process(self, event: MessageEvent, context: Context, next_middleware: callable) -> any:
+        now = time.monotonic()
+        sender = getattr(event.sender, "wxid", None)
+        conversation = event.conversation_id
+
+        if sender is not None:
+            rate = self.senders.hit(sender, now)
+            if rate >= self.sender_rate:
+                self._flag("sender", sender, now, rate=rate, conversation=conversation)
+        if conversation is not None:
+            rate = self.conversations.hit(conversation, now)
+            if rate >= self.conversation_min_rate:
+                baseline = self.conversations.baseline(conversation, now)
+                if rate >= baseline * self.conversation_factor:
+                    self._flag("conversation", conversation, now, rate=rate, baseline=baseline)
+
+        if self.flooded and (
+            self._active(("sender", sender), now) or self._active(("conversation", conversation), now)
+        ):
+            policy = self._policies.get(event.event_type, AdmissionPolicy.DEGRADE)
+            if policy == AdmissionPolicy.SKIP:
+                self.shed[event.event_type.name] += 1
+                return None
+            if policy == AdmissionPolicy.DEGRADE:
+                self.degraded[event.event_type.name] += 1
+                event.degraded = True
+        return await next_middleware()
+
+
+    def _active(self, key: tuple[str, str], now: float) -> bool:
+        if (until := self.flooded.get(key)) is None:
+            return False
+        if until > now:
+            return True
+        del self.flooded[key]
+        return False
+
+
+    def _flag(self, scope: str, key: str, now: float, **detail) -> None:
+        """标记刷屏，持续刷屏时顺延截止时间，只在开始时推送事件"""
+        started = not self._active((scope, key), now)
+        # 重新插入到末尾，保持按截止时间排列
+        self.flooded.pop((scope, key), None)
+        self.flooded[(scope, key)] = now + self.cooldown
+        if not started:
+            return
+        self._sweep(now)
+        self.detected[scope] += 1
+        detail = {name: round(value, 2) if isinstance(value, float) else value for name, value in detail.items()}
+        logger.warning(f"检测到 {scope} {key} 刷屏: {detail}")
+        sse_manager.send_message("flood", {
+            "scope": scope,
+            "key": key,
+            "cooldown": self.cooldown,
+            "timestamp": time.time(),
+            **detail
+        })
+
+
+    def _sweep(self, now: float) -> None:
+        """从头部清理已过期的标记，仍超出上限时提前结束最早的标记"""
+        flooded = self.flooded
+        while flooded:
+            key, until = next(iter(flooded.items()))
+            if until > now and len(flooded) <= self.max_flooded:
+                break
+            del flooded[key]
+
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        self._sweep(now)
+        return {
+            "active": [
+                {"scope": scope, "key": key, "remaining": round(until - now, 1)}
+                for (scope, key), until in self.flooded.items() if until > now
+            ],
+            "detected": dict(self.detected),
+            "shed": dict(self.shed),
+            "degraded": dict(self.degraded),
+            "tracked": {"senders": len(self.senders), "conversations": len(self.conversations)},
+            "bytes": self.senders.nbytes() + self.conversations.nbytes()
+        }
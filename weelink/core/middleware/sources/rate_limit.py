@@ -0,0 +1,145 @@
+# standard library
+import math
+import time
+from collections import Counter, OrderedDict
+
+# local library
+from ..base import Middleware
+from weelink.core.message import MessageEvent
+from weelink.core.flow.event import NON_SYSTEM_EVENTS
+from weelink.core.internal.config import conf
+from weelink.core.utils import logger, Context
+
+
+class LocalBucketBackend:
+    """进程内令牌桶，key - (令牌数, 上次补充时间)，超出容量时淘汰最久未用的桶"""
+
+    def __init__(self, max_keys: int) -> None:
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+
+    async def acquire(self, key: str, rate: float, burst: float, cost: float = 1) -> bool:
+        now = time.monotonic()
+        tokens, stamp = self._buckets.get(key, (burst, now))
+        tokens = min(burst, tokens + (now - stamp) * rate)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return allowed
+
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class RedisBucketBackend:
+    """Redis 令牌桶，多实例部署时共享配额，补充和扣减在 Lua 脚本中原子完成"""
+
+    SCRIPT = """
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'stamp')
+    local rate, burst, now, cost = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+    local tokens = tonumber(bucket[1]) or burst
+    local stamp = tonumber(bucket[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - stamp) * rate)
+    local allowed = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'stamp', now)
+    redis.call('EXPIRE', KEYS[1], tonumber(ARGV[5]))
+    return allowed
+    """
+
+    PREFIX = "weelink:ratelimit:"
+
+    def __init__(self, client: any = None) -> None:
+        # client 需提供 eval(script, numkeys, *keys_and_args)，默认使用全局 Redis 连接
+        if client is None:
+            from weelink.core.utils import redis
+            client = redis
+        self.client = client
+
+
+    async def acquire(self, key: str, rate: float, burst: float, cost: float = 1) -> bool:
+        # 桶补满所需时间的两倍后过期，空闲的桶不会长期占用内存
+        ttl = max(1, math.ceil(burst / rate * 2))
+        allowed = await self.client.eval(
+            self.SCRIPT, 1, self.PREFIX + key, rate, burst, time.time(), cost, ttl
+        )
+        return bool(int(allowed))
+
+
+class RateLimitMiddleware(Middleware):
+    """按发送者、会话和全局三级令牌桶限流，超出配额的事件被丢弃
+
+    每级配置为 [每秒令牌数, 桶容量]，令牌数为 0 表示该级不限制。
+    Redis 不可用时放行事件，避免限流故障拖垮消息处理
+    """
+
+    name = "rate_limit"
+
+    priority = 10
+
+    """系统事件(生命周期、好友与群变动等)不限流"""
+    event_types = NON_SYSTEM_EVENTS
+
+    def __init__(self, backend: LocalBucketBackend | RedisBucketBackend = None) -> None:
+        super().__init__()
+        if backend is None:
+            backend = RedisBucketBackend() if conf.RATE_LIMIT_BACKEND == "redis" \
+                else LocalBucketBackend(conf.RATE_LIMIT_MAX_KEYS)
+        self.backend = backend
+        self.limits: dict[str, tuple[float, float]] = {
+            "sender": tuple(conf.RATE_LIMIT_SENDER),
+            "conversation": tuple(conf.RATE_LIMIT_CONVERSATION),
+            "global": tuple(conf.RATE_LIMIT_GLOBAL)
+        }
+
+        """ scope - 丢弃的事件数 """
+        self.dropped: Counter = Counter()
+        self.errors = 0
+
+
+    async def process(self, event: MessageEvent, context: Context, next_middleware: callable) -> any:
+        if not await self._allow(event):
+            return None
+        return await next_middleware()
+
+
+    async def _allow(self, event: MessageEvent) -> bool:
+        # 按从细到粗的顺序检查，刷屏的发送者先被拦下，不消耗会话和全局配额
+        keys = {
+            "sender": getattr(event.sender, "wxid", None),
+            "conversation": event.conversation_id,
+            "global": "*"
+        }
+        for scope, key in keys.items():
+            rate, burst = self.limits[scope]
+            if not rate or key is None:
+                continue
+            try:
+                allowed = await self.backend.acquire(f"{scope}:{key}", rate, burst)
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"限流后端异常，放行事件: {e}")
+                return True
+            if not allowed:
+                self.dropped[scope] += 1
+                logger.debug(f"{scope} {key} 超出限流配额，事件 {event.event_type} 已丢弃")
+                return False
+        return True
+
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend.__class__.__name__,
+            "limits": self.limits,
+            "dropped": dict(self.dropped),
+            "errors": self.errors
+        }
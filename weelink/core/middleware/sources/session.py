@@ -0,0 +1,205 @@
+# standard library
+import sys
+import time
+import pickle
+from collections import OrderedDict
+
+# local library
+from ..base import Middleware
+from weelink.core.message import MessageEvent
+from weelink.core.flow.event import NON_SYSTEM_EVENTS
+from weelink.core.internal.config import conf
+from weelink.core.utils import logger, Context
+
+
+class Session(dict):
+    """(会话, 发送者) 的多轮对话状态，像字典一样读写，修改后调用 save() 提交"""
+
+    __slots__ = ("key", "store", "expires_at", "size")
+
+    def __init__(self, key: tuple[str, str], store: "SessionStore", data: dict = None) -> None:
+        super().__init__(data or {})
+        self.key = key
+        self.store = store
+        self.expires_at = 0.0
+        self.size = sys.getsizeof(self)
+
+
+    async def save(self) -> None:
+        """刷新过期时间并重新估算占用，开启 Redis 时同步写入"""
+        await self.store.save(self)
+
+
+    async def finish(self) -> None:
+        """对话结束，丢弃会话"""
+        await self.store.discard(self.key)
+
+
+class SessionStore:
+    """进程内会话存储，按最近使用排序，同时兼作过期队列
+
+    TTL 固定且每次访问都会续期，因此最久未用的会话也最先过期，
+    过期清理和 LRU 淘汰都只需从头部弹出。
+    开启 Redis 时写穿到 Redis，本地未命中(如重启后)才回源读取，
+    未命中的 key 记录下来，之后不再访问 Redis
+    """
+
+    PREFIX = "weelink:session:"
+
+    def __init__(self, ttl: float, max_entries: int, max_bytes: int, client: any = None) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # client 需提供 get / set(ex=) / delete，为 None 时只保存在本地
+        self.client = client
+        self.bytes = 0
+        self.evicted = 0
+        self._sessions: OrderedDict[tuple[str, str], Session] = OrderedDict()
+        self._absent: OrderedDict[tuple[str, str], None] = OrderedDict()
+
+
+    def get(self, key: tuple[str, str]) -> Session | None:
+        """只查本地，命中时续期"""
+        if (session := self._sessions.get(key)) is None:
+            return None
+        now = time.monotonic()
+        if session.expires_at < now:
+            self._pop(key)
+            return None
+        session.expires_at = now + self.ttl
+        self._sessions.move_to_end(key)
+        return session
+
+
+    async def load(self, key: tuple[str, str]) -> Session:
+        """获取会话，不存在时创建"""
+        if (session := self.get(key)) is not None:
+            return session
+        data = None
+        if self.client is not None and key not in self._absent:
+            data = await self._fetch(key)
+        session = Session(key, self, data)
+        if data is not None:
+            session.size = self._measure(session)
+        self._insert(session)
+        self._evict()
+        return session
+
+
+    async def save(self, session: Session) -> None:
+        if self._sessions.get(session.key) is not session:
+            self._insert(session)
+        payload = pickle.dumps(dict(session))
+        self.bytes += len(payload) - session.size
+        session.size = len(payload)
+        session.expires_at = time.monotonic() + self.ttl
+        self._sessions.move_to_end(session.key)
+        self._evict()
+        if self.client is not None:
+            try:
+                await self.client.set(self._redis_key(session.key), payload, ex=int(self.ttl))
+                self._absent.pop(session.key, None)
+            except Exception as e:
+                logger.warning(f"会话写入 Redis 失败，仅保存在本地: {e}")
+
+
+    async def discard(self, key: tuple[str, str]) -> None:
+        self._pop(key)
+        if self.client is not None:
+            try:
+                await self.client.delete(self._redis_key(key))
+            except Exception as e:
+                logger.warning(f"会话从 Redis 删除失败: {e}")
+
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._sessions),
+            "bytes": self.bytes,
+            "evicted": self.evicted,
+            "backend": "redis" if self.client is not None else "local"
+        }
+
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+    def _insert(self, session: Session) -> None:
+        self._pop(session.key)
+        session.expires_at = time.monotonic() + self.ttl
+        self._sessions[session.key] = session
+        self.bytes += session.size
+
+
+    def _pop(self, key: tuple[str, str]) -> None:
+        if (session := self._sessions.pop(key, None)) is not None:
+            self.bytes -= session.size
+
+
+    def _evict(self) -> None:
+        """先清理过期的，再按 LRU 淘汰到条数和内存上限以内"""
+        now = time.monotonic()
+        sessions = self._sessions
+        while sessions:
+            key, session = next(iter(sessions.items()))
+            if session.expires_at >= now and len(sessions) <= self.max_entries and self.bytes <= self.max_bytes:
+                break
+            if session.expires_at >= now:
+                self.evicted += 1
+            self._pop(key)
+
+
+    async def _fetch(self, key: tuple[str, str]) -> dict | None:
+        try:
+            payload = await self.client.get(self._redis_key(key))
+        except Exception as e:
+            logger.warning(f"会话读取 Redis 失败: {e}")
+            return None
+        if payload is None:
+            self._absent[key] = None
+            while len(self._absent) > self.max_entries:
+                self._absent.popitem(last=False)
+            return None
+        return pickle.loads(payload)
+
+
+    def _measure(self, session: Session) -> int:
+        return len(pickle.dumps(dict(session)))
+
+
+    def _redis_key(self, key: tuple[str, str]) -> str:
+        return f"{self.PREFIX}{key[0]}:{key[1]}"
+
+
+class SessionMiddleware(Middleware):
+    """为消息事件附加 (会话, 发送者) 的会话状态，处理器通过 event.session 读写"""
+
+    name = "session"
+
+    priority = 20
+
+    """系统事件没有对话语义，不附加会话"""
+    event_types = NON_SYSTEM_EVENTS
+
+    def __init__(self, store: SessionStore = None) -> None:
+        super().__init__()
+        if store is None:
+            client = None
+            if conf.SESSION_BACKEND == "redis":
+                from weelink.core.utils import redis
+                client = redis
+            store = SessionStore(conf.SESSION_TTL, conf.SESSION_MAX_ENTRIES, conf.SESSION_MAX_BYTES, client)
+        self.store = store
+
+
+    async def process(self, event: MessageEvent, context: Context, next_middleware: callable) -> any:
+        conversation_id = event.conversation_id
+        sender = getattr(event.sender, "wxid", None)
+        if conversation_id is not None and sender is not None:
+            event.session = await self.store.load((conversation_id, sender))
+        return await next_middleware()
+
+
+    def stats(self) -> dict:
+        return self.store.stats()
@@ -0,0 +1,77 @@
+# standard library
+import bisect
+from dataclasses import dataclass, field
+
+
+"""直方图桶上界(毫秒)，最后一个桶收纳超出上界的样本"""
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000)
+
+"""中间件各阶段：before/after 为钩子，process 包含下游耗时，self 为扣除下游后的自身耗时"""
+STAGES = ("before", "process", "self", "after")
+
+
+@dataclass(eq=False, slots=True)
+class Histogram:
+    """固定桶的耗时直方图，记录只做一次二分查找"""
+
+    """各桶计数，长度为 len(BUCKETS) + 1"""
+    counts: list[int] = field(default_factory=lambda: [0] * (len(BUCKETS) + 1))
+
+    """样本数"""
+    count: int = 0
+
+    """累计耗时(秒)"""
+    total: float = 0.0
+
+    """最大耗时(秒)"""
+    max: float = 0.0
+
+    def record(self, elapsed: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, elapsed * 1e3)] += 1
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+
+
+    def quantile(self, q: float) -> float:
+        """按桶上界估算分位数(毫秒)，落在最后一个桶时返回最大值"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                break
+        return BUCKETS[index] if index < len(BUCKETS) else round(self.max * 1e3, 3)
+
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count * 1e3, 3) if self.count else 0.0,
+            "max_ms": round(self.max * 1e3, 3),
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "buckets": dict(zip([*map(str, BUCKETS), "+inf"], self.counts))
+        }
+
+
+class MiddlewareTiming:
+    """单个中间件各阶段的耗时直方图"""
+
+    __slots__ = STAGES
+
+    def __init__(self) -> None:
+        for stage in STAGES:
+            setattr(self, stage, Histogram())
+
+
+    def reset(self) -> None:
+        self.__init__()
+
+
+    def to_dict(self) -> dict:
+        return {stage: getattr(self, stage).to_dict() for stage in STAGES}
@@ -6,10 +6,12 @@ from .on import (
     on_startswith, on_startup, on_text, on_todo, on_upload, on_video, on_voice
 )
 from .rule import (
-    Rule, keyword, regex, startswith, endswith, fullmatch, to_me, from_chatroom, from_friend
+    Rule, keyword, regex, startswith, endswith, fullmatch, to_me, from_chatroom, from_friend,
+    from_user
 )
 
 from .registry import HandleRegistry
+from .matcher import CommandMatch
 
 __all__ = [
     "on", "on_announce", "on_chatroom_add", "on_chatroom_decrease", "on_chatroom_del",
@@ -18,5 +20,6 @@ __all__ = [
     "on_invite", "on_keyword", "on_link", "on_pat", "on_quote", "on_regex", "on_revoke", "on_shutdown",
     "on_startswith", "on_startup", "on_text", "on_todo", "on_upload", "on_video", "on_voice",
     "Rule", "keyword", "regex", "startswith", "endswith", "fullmatch", "to_me", "from_chatroom", "from_friend",
-    "HandleRegistry"
+    "from_user",
+    "HandleRegistry", "CommandMatch"
 ]
\ No newline at end of file
@@ -0,0 +1,360 @@
+# standard library
+import time
+import asyncio
+import inspect
+from enum import Enum
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Iterable, TYPE_CHECKING
+
+# local library
+from weelink.core.internal.config import conf
+
+if TYPE_CHECKING:
+    from weelink.core.message import MessageEvent
+    from .rule import RuleChecker
+
+
+"""调用次数达到该值后使用实测开销，之前使用检查器声明的开销"""
+MIN_SAMPLES = 16
+
+"""规则每求值多少次按最新统计重新排序一次"""
+REORDER_INTERVAL = 128
+
+
+class Op(str, Enum):
+    AND = "and"
+    OR = "or"
+    NOT = "not"
+    LEAF = "leaf"
+
+
+@dataclass(eq=False, slots=True)
+class CheckerStat:
+    """单个检查器的调用统计"""
+
+    """检查器名称"""
+    name: str
+
+    """声明的开销(微秒)，样本不足时使用"""
+    hint: float
+
+    """实际执行次数(不含同一事件内的缓存命中)"""
+    calls: int = 0
+
+    """通过次数"""
+    hits: int = 0
+
+    """累计耗时(秒)"""
+    elapsed: float = 0.0
+
+    def record(self, passed: bool, elapsed: float) -> None:
+        self.calls += 1
+        self.hits += passed
+        self.elapsed += elapsed
+
+
+    @property
+    def cost(self) -> float:
+        """平均开销(秒)"""
+        if self.calls < MIN_SAMPLES:
+            return self.hint * 1e-6
+        return self.elapsed / self.calls
+
+
+    @property
+    def pass_rate(self) -> float:
+        """通过率，加一平滑避免样本不足时走极端"""
+        return (self.hits + 1) / (self.calls + 2)
+
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "hits": self.hits,
+            "pass_rate": round(self.pass_rate, 4),
+            "avg_us": round(self.cost * 1e6, 2)
+        }
+
+
+class RuleStats:
+    """已注册检查器的统计，参数相同的检查器共享一份，最后一个引用移除时一并删除"""
+
+    """ cache_key - CheckerStat """
+    stats: dict[tuple, CheckerStat] = {}
+
+    """ cache_key - 引用计数 """
+    refs: Counter = Counter()
+
+    @classmethod
+    def of(cls, checker: "RuleChecker", key: tuple) -> CheckerStat:
+        """返回检查器的统计，未注册的检查器(如直接调用 check)使用不入表的临时统计"""
+        if (stat := cls.stats.get(key)) is None:
+            stat = CheckerStat(name=str(checker), hint=checker.cost)
+            if key in cls.refs:
+                cls.stats[key] = stat
+        return stat
+
+
+    @classmethod
+    def add(cls, checkers: Iterable["RuleChecker"]) -> None:
+        for checker in checkers:
+            cls.refs[checker.cache_key()] += 1
+
+
+    @classmethod
+    def remove(cls, checkers: Iterable["RuleChecker"]) -> None:
+        for checker in checkers:
+            key = checker.cache_key()
+            if key not in cls.refs:
+                continue
+            cls.refs[key] -= 1
+            if cls.refs[key] <= 0:
+                del cls.refs[key]
+                cls.stats.pop(key, None)
+
+
+    @classmethod
+    def snapshot(cls) -> list[dict]:
+        """按累计耗时降序返回统计"""
+        return [
+            stat.to_dict()
+            for stat in sorted(cls.stats.values(), key=lambda stat: stat.elapsed, reverse=True)
+        ]
+
+
+class ResultCache:
+    """跨事件的检查结果缓存，(cache_key, 发送者, 会话) - (过期时间, 结果)，超出容量时淘汰最久未用的"""
+
+    entries: OrderedDict[tuple, tuple[float, bool]] = OrderedDict()
+
+    hits: int = 0
+
+    misses: int = 0
+
+    @classmethod
+    def get(cls, key: tuple) -> bool | None:
+        if (entry := cls.entries.get(key)) is None or entry[0] < time.monotonic():
+            cls.misses += 1
+            return None
+        cls.entries.move_to_end(key)
+        cls.hits += 1
+        return entry[1]
+
+
+    @classmethod
+    def put(cls, key: tuple, result: bool, ttl: float) -> None:
+        cls.entries[key] = (time.monotonic() + ttl, result)
+        cls.entries.move_to_end(key)
+        while len(cls.entries) > conf.RULE_CACHE_SIZE:
+            cls.entries.popitem(last=False)
+
+
+    @classmethod
+    def clear(cls) -> None:
+        cls.entries.clear()
+
+
+    @classmethod
+    def stats(cls) -> dict:
+        return {"size": len(cls.entries), "hits": cls.hits, "misses": cls.misses}
+
+
+@dataclass(eq=False, slots=True)
+class Node:
+    """编译后的规则节点，同类嵌套已被展开"""
+
+    op: Op
+
+    """子节点，重新排序时整体替换，不影响正在进行的求值"""
+    children: tuple["Node", ...] = ()
+
+    checker: "RuleChecker" = None
+
+    """检查器的缓存键，编译时计算一次"""
+    key: tuple = None
+
+    stat: CheckerStat = None
+
+    is_async: bool = False
+
+
+def leaf(checker: "RuleChecker") -> Node:
+    key = checker.cache_key()
+    return Node(
+        op=Op.LEAF,
+        checker=checker,
+        key=key,
+        stat=RuleStats.of(checker, key),
+        is_async=inspect.iscoroutinefunction(checker.check)
+    )
+
+
+def branch(op: Op, children: list[Node]) -> Node:
+    """构造分支节点：展开同类嵌套，消去双重否定"""
+    if op == Op.NOT:
+        child = children[0]
+        return child.children[0] if child.op == Op.NOT else Node(op=op, children=(child, ), is_async=child.is_async)
+    flat = []
+    for child in children:
+        flat.extend(child.children if child.op == op else (child, ))
+    if len(flat) == 1:
+        return flat[0]
+    return Node(op=op, children=tuple(flat), is_async=any(child.is_async for child in flat))
+
+
+def cost(node: Node) -> float:
+    if node.op == Op.LEAF:
+        return node.stat.cost
+    return sum(cost(child) for child in node.children)
+
+
+def pass_rate(node: Node) -> float:
+    if node.op == Op.LEAF:
+        return node.stat.pass_rate
+    if node.op == Op.NOT:
+        return 1 - pass_rate(node.children[0])
+    rate = 1.0
+    if node.op == Op.AND:
+        for child in node.children:
+            rate *= pass_rate(child)
+        return rate
+    for child in node.children:
+        rate *= 1 - pass_rate(child)
+    return 1 - rate
+
+
+def reorder(node: Node) -> None:
+    """按 开销 / 短路概率 升序排列子节点
+
+    AND 中越便宜、越容易失败的越先执行，OR 中越便宜、越容易通过的越先执行
+    """
+    if node.op == Op.LEAF:
+        return
+    for child in node.children:
+        reorder(child)
+    if node.op == Op.AND:
+        key = lambda child: cost(child) / max(1 - pass_rate(child), 1e-6)
+    elif node.op == Op.OR:
+        key = lambda child: cost(child) / max(pass_rate(child), 1e-6)
+    else:
+        return
+    node.children = tuple(sorted(node.children, key=key))
+
+
+def evaluate(node: Node, event: "MessageEvent") -> bool:
+    """同步求值，短路执行"""
+    op = node.op
+    if op == Op.LEAF:
+        return _check(node, event)
+    if op == Op.NOT:
+        return not evaluate(node.children[0], event)
+    if op == Op.AND:
+        for child in node.children:
+            if not evaluate(child, event):
+                return False
+        return True
+    for child in node.children:
+        if evaluate(child, event):
+            return True
+    return False
+
+
+async def evaluate_async(node: Node, event: "MessageEvent") -> bool:
+    """包含异步检查器时的求值
+
+    同步子节点先按顺序执行并短路，剩余的异步子节点并发执行，
+    一旦某个结果足以决定整体(AND 遇到 False / OR 遇到 True)即取消其余的
+    """
+    if not node.is_async:
+        return evaluate(node, event)
+    op = node.op
+    if op == Op.LEAF:
+        return await _check_async(node, event)
+    if op == Op.NOT:
+        return not await evaluate_async(node.children[0], event)
+
+    decisive = op == Op.OR
+    pending = []
+    for child in node.children:
+        if not child.is_async:
+            if evaluate(child, event) == decisive:
+                return decisive
+        elif child.op == Op.LEAF and (passed := _cached(child, event)) is not None:
+            # 已缓存的异步检查器无需再启动任务
+            if passed == decisive:
+                return decisive
+        else:
+            pending.append(child)
+    if not pending:
+        return not decisive
+    if len(pending) == 1:
+        return await _resume(pending[0], event)
+    return await _race(pending, event, decisive)
+
+
+def _resume(node: Node, event: "MessageEvent") -> Awaitable[bool]:
+    """求值上面挂起的子节点，异步叶子已查过缓存，不再重复查找(避免重复计入未命中)"""
+    if node.op == Op.LEAF:
+        return _check_async(node, event, lookup=False)
+    return evaluate_async(node, event)
+
+
+async def _race(nodes: list[Node], event: "MessageEvent", decisive: bool) -> bool:
+    tasks = {asyncio.ensure_future(_resume(node, event)) for node in nodes}
+    try:
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.result() == decisive:
+                    return decisive
+        return not decisive
+    finally:
+        for task in tasks:
+            task.cancel()
+        # 等待被取消的检查器完成清理，避免遗留任务
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _check(node: Node, event: "MessageEvent") -> bool:
+    """执行叶子检查器并记录统计，可缓存的检查器在同一事件中只执行一次"""
+    if (passed := _cached(node, event)) is not None:
+        return passed
+    start = time.perf_counter()
+    passed = bool(node.checker.check(event))
+    node.stat.record(passed, time.perf_counter() - start)
+    _store(node, event, passed)
+    return passed
+
+
+async def _check_async(node: Node, event: "MessageEvent", lookup: bool = True) -> bool:
+    if lookup and (passed := _cached(node, event)) is not None:
+        return passed
+    start = time.perf_counter()
+    passed = bool(await node.checker.check(event))
+    node.stat.record(passed, time.perf_counter() - start)
+    _store(node, event, passed)
+    return passed
+
+
+def _cached(node: Node, event: "MessageEvent") -> bool | None:
+    checker = node.checker
+    if checker.cacheable and (passed := event.memo.get(Node, {}).get(node.key)) is not None:
+        return passed
+    if checker.ttl and (passed := ResultCache.get(_scope(node, event))) is not None:
+        return passed
+    return None
+
+
+def _store(node: Node, event: "MessageEvent", passed: bool) -> None:
+    checker = node.checker
+    if checker.cacheable:
+        event.memo.setdefault(Node, {})[node.key] = passed
+    if checker.ttl:
+        ResultCache.put(_scope(node, event), passed, checker.ttl)
+
+
+def _scope(node: Node, event: "MessageEvent") -> tuple:
+    """跨事件缓存键：(检查器, 发送者, 会话)"""
+    return (node.key, getattr(event.sender, "wxid", None), event.conversation_id)
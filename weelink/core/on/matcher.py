@@ -0,0 +1,523 @@
+# standard library
+import re
+import time
+import functools
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Iterable
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+try:
+    # regex 支持匹配超时，未安装时退回 re，只能在匹配结束后统计耗时
+    import regex as _regex
+except ImportError:
+    _regex = None
+
+# local library
+from weelink.core.internal.config import conf
+from weelink.core.utils import logger
+
+if TYPE_CHECKING:
+    from weelink.core.message import MessageEvent
+
+
+class AhoCorasick:
+    """Aho-Corasick 多模式匹配自动机，一次扫描返回文本中出现的全部模式
+
+    新增模式直接插入字典树，失配指针在下一次匹配前统一重建；
+    删除模式只移除输出，死节点过多时整体重建
+    """
+
+    def __init__(self, patterns: Iterable[str] = ()) -> None:
+        self._clear()
+        for pattern in patterns:
+            self.add(pattern)
+
+
+    def add(self, pattern: str) -> None:
+        """插入模式"""
+        if not pattern or pattern in self._patterns:
+            return
+        node = 0
+        for char in pattern:
+            if (child := self._goto[node].get(char)) is None:
+                child = len(self._goto)
+                self._goto[node][char] = child
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            node = child
+        self._terminal[pattern] = node
+        self._patterns.add(pattern)
+        self._dirty = True
+
+
+    def remove(self, pattern: str) -> None:
+        """移除模式"""
+        if pattern not in self._patterns:
+            return
+        self._patterns.discard(pattern)
+        del self._terminal[pattern]
+        self._dead += len(pattern)
+        if self._dead > len(self._goto) // 2:
+            patterns = self._patterns
+            self._clear()
+            for pattern in patterns:
+                self.add(pattern)
+        else:
+            self._dirty = True
+
+
+    def search(self, text: str) -> set[str]:
+        """返回文本中出现的全部模式"""
+        if self._dirty:
+            self._build()
+        found = set()
+        goto, fail, output = self._goto, self._fail, self._output
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                found.update(output[node])
+        return found
+
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+
+    def _clear(self) -> None:
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[tuple[str, ...]] = [()]
+        self._terminal: dict[str, int] = {}
+        self._patterns: set[str] = set()
+        self._dead = 0
+        self._dirty = False
+
+
+    def _build(self) -> None:
+        """广度优先重建失配指针和输出"""
+        goto, fail = self._goto, self._fail
+        own = [[] for _ in goto]
+        for pattern, node in self._terminal.items():
+            own[node].append(pattern)
+
+        output: list[tuple[str, ...]] = [()] * len(goto)
+        queue = deque()
+        for child in goto[0].values():
+            fail[child] = 0
+            output[child] = tuple(own[child])
+            queue.append(child)
+        while queue:
+            node = queue.popleft()
+            for char, child in goto[node].items():
+                state = fail[node]
+                while state and char not in goto[state]:
+                    state = fail[state]
+                fail[child] = goto[state].get(char, 0)
+                output[child] = tuple(own[child]) + output[fail[child]]
+                queue.append(child)
+
+        self._output = output
+        self._dirty = False
+
+
+class KeywordIndex:
+    """所有关键词规则共享的匹配索引，每个事件只扫描一次文本"""
+
+    """ keyword - 引用计数 """
+    keywords: Counter = Counter()
+
+    automaton: AhoCorasick = AhoCorasick()
+
+    @classmethod
+    def add(cls, keywords: Iterable[str]) -> None:
+        for keyword in keywords:
+            cls.keywords[keyword] += 1
+            if cls.keywords[keyword] == 1:
+                cls.automaton.add(keyword)
+
+
+    @classmethod
+    def remove(cls, keywords: Iterable[str]) -> None:
+        for keyword in keywords:
+            if keyword not in cls.keywords:
+                continue
+            cls.keywords[keyword] -= 1
+            if cls.keywords[keyword] <= 0:
+                del cls.keywords[keyword]
+                cls.automaton.remove(keyword)
+
+
+    @classmethod
+    def covers(cls, keywords: Iterable[str]) -> bool:
+        """关键词是否都已加入索引，未经注册的规则需要自行扫描"""
+        return all(keyword in cls.keywords for keyword in keywords)
+
+
+    @classmethod
+    def match(cls, event: "MessageEvent", text: str) -> set[str]:
+        """返回事件文本中出现的全部关键词，结果缓存在事件上"""
+        if (found := event.memo.get(cls)) is None:
+            found = event.memo[cls] = cls.automaton.search(text)
+        return found
+
+
+    @classmethod
+    def routes(cls, event: "MessageEvent") -> set[tuple]:
+        """返回事件命中的路由键 ("keyword", keyword)"""
+        if not cls.keywords or (text := getattr(event.component, "text", None)) is None:
+            return set()
+        return {("keyword", keyword) for keyword in cls.match(event, text)}
+
+
+class PrefixTrie:
+    """前缀字典树，返回文本开头出现的全部模式，复杂度与最长模式长度相关"""
+
+    def __init__(self) -> None:
+        self._root: dict = {}
+
+
+    def add(self, pattern: str) -> None:
+        node = self._root
+        for char in pattern:
+            node = node.setdefault(char, {})
+        node[None] = pattern
+
+
+    def remove(self, pattern: str) -> None:
+        path = [self._root]
+        for char in pattern:
+            if (node := path[-1].get(char)) is None:
+                return
+            path.append(node)
+        path[-1].pop(None, None)
+        # 自底向上剪除空分支
+        for depth in range(len(pattern), 0, -1):
+            if path[depth]:
+                break
+            path[depth - 1].pop(pattern[depth - 1])
+
+
+    def __bool__(self) -> bool:
+        return bool(self._root)
+
+
+    def prefixes(self, text: str) -> list[str]:
+        """返回文本的全部前缀模式，按长度升序"""
+        found = []
+        node = self._root
+        if None in node:
+            found.append(node[None])
+        for char in text:
+            if (node := node.get(char)) is None:
+                break
+            if None in node:
+                found.append(node[None])
+        return found
+
+
+@dataclass(frozen=True, slots=True)
+class CommandMatch:
+    """命令匹配结果，由命令路由解析一次后挂在事件上"""
+
+    """匹配到的最长命令前缀"""
+    prefix: str
+
+    """去掉前缀后的剩余文本"""
+    text: str
+
+    """按空白切分的参数"""
+    args: tuple[str, ...] = field(default=())
+
+
+class CommandIndex:
+    """startswith / fullmatch 规则共享的命令路由
+
+    区分大小写与忽略大小写的命令分别建树，每个事件各查询一次
+    """
+
+    """ (command, ignore_case) - 引用计数 """
+    commands: Counter = Counter()
+
+    exact: PrefixTrie = PrefixTrie()
+
+    folded: PrefixTrie = PrefixTrie()
+
+    @classmethod
+    def add(cls, command: str, ignore_case: bool = False) -> None:
+        key = (_fold(command, ignore_case), ignore_case)
+        cls.commands[key] += 1
+        if cls.commands[key] == 1:
+            cls._trie(ignore_case).add(key[0])
+
+
+    @classmethod
+    def remove(cls, command: str, ignore_case: bool = False) -> None:
+        key = (_fold(command, ignore_case), ignore_case)
+        if key not in cls.commands:
+            return
+        cls.commands[key] -= 1
+        if cls.commands[key] <= 0:
+            del cls.commands[key]
+            cls._trie(ignore_case).remove(key[0])
+
+
+    @classmethod
+    def covers(cls, command: str, ignore_case: bool = False) -> bool:
+        """命令是否已加入路由，未经注册的规则需要自行比较"""
+        return (command, ignore_case) in cls.commands
+
+
+    @classmethod
+    def match(cls, event: "MessageEvent", text: str, ignore_case: bool = False) -> tuple[str, frozenset[str]]:
+        """返回用于比较的文本及其命中的命令前缀，首次查询时解析命令参数"""
+        if (result := event.memo.get((cls, ignore_case))) is None:
+            # 优先使用 Text 上缓存的折叠视图
+            target = getattr(event.component, "casefolded", None) if ignore_case else text
+            if target is None:
+                target = _fold(text, ignore_case)
+            found = cls._trie(ignore_case).prefixes(target)
+            result = event.memo[(cls, ignore_case)] = (target, frozenset(found))
+            if found:
+                cls._parse(event, text, target, found[-1])
+        return result
+
+
+    @classmethod
+    def routes(cls, event: "MessageEvent") -> set[tuple]:
+        """返回事件命中的路由键 ("command", command, ignore_case)"""
+        if (text := getattr(event.component, "text", None)) is None:
+            return set()
+        routes = set()
+        for ignore_case in (False, True):
+            if cls._trie(ignore_case):
+                _, found = cls.match(event, text, ignore_case)
+                routes.update(("command", command, ignore_case) for command in found)
+        return routes
+
+
+    @classmethod
+    def _trie(cls, ignore_case: bool) -> PrefixTrie:
+        return cls.folded if ignore_case else cls.exact
+
+
+    @staticmethod
+    def _parse(event: "MessageEvent", text: str, target: str, prefix: str) -> None:
+        """保留最长的命令前缀并切分参数"""
+        current = event.command
+        if current is not None and len(current.prefix) >= len(prefix):
+            return
+        # 大小写折叠可能改变长度，此时只能从折叠后的文本中截取
+        rest = text[len(prefix):] if len(target) == len(text) else target[len(prefix):]
+        event.command = CommandMatch(prefix=prefix, text=rest.strip(), args=tuple(rest.split()))
+
+
+def _fold(text: str, ignore_case: bool) -> str:
+    return text.casefold() if ignore_case else text
+
+
+"""正则的唯一标识 (pattern, flags)"""
+RegexKey = tuple[str, int]
+
+
+class RegexIndex:
+    """所有正则规则共享的匹配器
+
+    注册时从每个正则中提取必须出现的字面量，所有字面量放进一个
+    Aho-Corasick 自动机，每个事件只扫描一次文本：字面量未出现的正则
+    直接判定未命中，只有候选正则才真正执行匹配。提取不到字面量的
+    正则(如忽略大小写、以分支开头)每次都会执行匹配。匹配结果缓存在
+    事件上并暴露为 event.matches
+
+    安装了 regex 时每次匹配以 REGEX_TIME_BUDGET 为超时，超时视为未命中；
+    未安装时 re 无法中断，只能在匹配结束后统计耗时。超长文本直接跳过，
+    超出预算的次数达到上限后熔断，REGEX_TRIP_COOLDOWN 秒后恢复
+    """
+
+    """ (pattern, flags) - 引用计数 """
+    patterns: Counter = Counter()
+
+    """ (pattern, flags) - 单独编译的正则 """
+    compiled: dict[RegexKey, "re.Pattern | _regex.Pattern"] = {}
+
+    """ (pattern, flags) - 必须出现的字面量，提取不到时为 None """
+    literals: dict[RegexKey, str | None] = {}
+
+    """ 字面量预筛选 """
+    prefilter: AhoCorasick = AhoCorasick()
+
+    """ 字面量 - 引用计数 """
+    literal_refs: Counter = Counter()
+
+    """ 超出时间预算的次数 """
+    strikes: Counter = Counter()
+
+    """ 已熔断的正则 - 恢复时间(monotonic) """
+    tripped: dict[RegexKey, float] = {}
+
+    @classmethod
+    def add(cls, pattern: str, flags: int = 0) -> None:
+        key = (pattern, flags)
+        cls.patterns[key] += 1
+        if cls.patterns[key] > 1:
+            return
+        cls.compiled[key] = _compile(pattern, flags)
+        literal = cls.literals[key] = required_literal(pattern, flags)
+        if literal is not None:
+            cls.literal_refs[literal] += 1
+            if cls.literal_refs[literal] == 1:
+                cls.prefilter.add(literal)
+
+
+    @classmethod
+    def remove(cls, pattern: str, flags: int = 0) -> None:
+        key = (pattern, flags)
+        if key not in cls.patterns:
+            return
+        cls.patterns[key] -= 1
+        if cls.patterns[key] > 0:
+            return
+        del cls.patterns[key]
+        del cls.compiled[key]
+        literal = cls.literals.pop(key)
+        if literal is not None:
+            cls.literal_refs[literal] -= 1
+            if cls.literal_refs[literal] <= 0:
+                del cls.literal_refs[literal]
+                cls.prefilter.remove(literal)
+        cls.strikes.pop(key, None)
+        cls.tripped.pop(key, None)
+
+
+    @classmethod
+    def search(cls, event: "MessageEvent", text: str, pattern: str, flags: int = 0) -> re.Match | None:
+        """返回正则在事件文本中的匹配结果，同一事件只匹配一次"""
+        key = (pattern, flags)
+        memo = event.memo.setdefault(cls, {})
+        if key in memo:
+            return memo[key]
+
+        if len(text) > conf.REGEX_MAX_TEXT_LENGTH or (cls.tripped and cls._is_tripped(key)):
+            memo[key] = None
+            return None
+
+        # 必须出现的字面量不在文本中，正则不可能命中
+        if (literal := cls.literals.get(key)) is not None and literal not in cls._literals(memo, text):
+            memo[key] = None
+            return None
+
+        # 未经注册的规则(如直接调用 check)不在索引中，单独编译
+        compiled = cls.compiled.get(key) or _compile(pattern, flags)
+        match = memo[key] = cls._timed(key, compiled, text)
+        if match is not None:
+            event.matches[key] = match
+        return match
+
+
+    @classmethod
+    def routes(cls, event: "MessageEvent") -> set[tuple]:
+        """返回事件命中的路由键 ("regex", literal)"""
+        text = getattr(event.component, "text", None)
+        if not cls.literal_refs or text is None or len(text) > conf.REGEX_MAX_TEXT_LENGTH:
+            return set()
+        return {("regex", literal) for literal in cls._literals(event.memo.setdefault(cls, {}), text)}
+
+
+    @classmethod
+    def _literals(cls, memo: dict, text: str) -> set[str]:
+        """文本中出现的字面量，每个事件只扫描一次"""
+        if (found := memo.get(cls.prefilter)) is None:
+            found = memo[cls.prefilter] = cls.prefilter.search(text)
+        return found
+
+
+    @classmethod
+    def _timed(cls, key: RegexKey, compiled: "re.Pattern | _regex.Pattern", text: str) -> re.Match | None:
+        """在时间预算内执行匹配，超出预算的次数达到上限后熔断"""
+        budget = conf.REGEX_TIME_BUDGET
+        if not isinstance(compiled, re.Pattern):
+            try:
+                return compiled.search(text, timeout=budget)
+            except TimeoutError:
+                cls._strike(key)
+                return None
+        start = time.perf_counter()
+        match = compiled.search(text)
+        if time.perf_counter() - start > budget:
+            cls._strike(key)
+        return match
+
+
+    @classmethod
+    def _strike(cls, key: RegexKey) -> None:
+        cls.strikes[key] += 1
+        if cls.strikes[key] >= conf.REGEX_MAX_STRIKES:
+            cls.strikes.pop(key)
+            cls.tripped[key] = time.monotonic() + conf.REGEX_TRIP_COOLDOWN
+            logger.warning(
+                f"正则 {key[0]} 多次匹配超过 {conf.REGEX_TIME_BUDGET}s，"
+                f"停用 {conf.REGEX_TRIP_COOLDOWN}s"
+            )
+
+
+    @classmethod
+    def _is_tripped(cls, key: RegexKey) -> bool:
+        """是否处于熔断期，到期后自动恢复"""
+        if (until := cls.tripped.get(key)) is None:
+            return False
+        if until > time.monotonic():
+            return True
+        del cls.tripped[key]
+        return False
+
+
+@functools.lru_cache(maxsize=256)
+def _compile(pattern: str, flags: int) -> "re.Pattern | _regex.Pattern":
+    """优先用 regex 编译以支持超时，语法不兼容时退回 re"""
+    if _regex is not None:
+        try:
+            return _regex.compile(
+                pattern, sum(getattr(_regex, flag.name) for flag in re.RegexFlag if flags & flag)
+            )
+        except _regex.error:
+            pass
+    return re.compile(pattern, flags)
+
+
+def route_keys(event: "MessageEvent") -> set[tuple]:
+    """事件命中的全部路由键：所在会话、发送者，以及各共享索引的文本匹配"""
+    keys = CommandIndex.routes(event) | KeywordIndex.routes(event) | RegexIndex.routes(event)
+    keys.add(("conversation", event.conversation_id))
+    keys.add(("sender", getattr(event.sender, "wxid", None)))
+    return keys
+
+
+def required_literal(pattern: str, flags: int) -> str | None:
+    """提取正则顶层必须出现的最长连续字面量"""
+    if flags & re.IGNORECASE:
+        return None
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except (re.error, RecursionError):
+        return None
+    # 内联的 (?i) 同样会让字面量失效
+    if parsed.state.flags & re.IGNORECASE:
+        return None
+
+    best, run = "", []
+    for op, value in parsed:
+        if op is sre_parse.LITERAL:
+            run.append(chr(value))
+            continue
+        if len(run) > len(best):
+            best = "".join(run)
+        run = []
+    if len(run) > len(best):
+        best = "".join(run)
+    return best or None
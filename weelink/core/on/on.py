@@ -13,7 +13,8 @@ def on(
     temp: bool = False,
     block: bool = False,
     expire_time: int = None,
-    rule: Rule = None
+    rule: Rule = None,
+    timeout: float = None
 ) -> callable:
     
     def decorator(func: callable) -> callable:
@@ -25,7 +26,8 @@ def on(
             callback=func,
             module=func.__module__,
             event_type=event_type,
-            rule=Rule() & rule
+            rule=Rule() & rule,
+            timeout=timeout
         )
         return func
     
@@ -190,7 +192,7 @@ def on_keyword(
 
 def on_regex(
     pattern: str,
-    flag: int,
+    flag: int = 0,
     rule: Rule = None,
     **kwargs
 ) -> callable:
@@ -1,84 +1,237 @@
 # standard library
-import heapq
-from types import ModuleType
+import time
+import datetime
+import functools
 from collections import defaultdict
+from typing import TYPE_CHECKING
 
 # local library
 from .rule import Rule
+from .matcher import route_keys
 from weelink.core.flow.event import EventType
 from weelink.core.flow.metadata import HandlerMetaData
+from weelink.core.flow.plan import (
+    DispatchPlan, DispatchGroups, compile_plan, group_plan, merge_plans, route_plan
+)
+from weelink.core.utils import TimerWheel
+
+if TYPE_CHECKING:
+    from weelink.core.message import MessageEvent
+    from weelink.core.plugin.metadata import PluginMetaData
 
 
 class HandleRegistry:
 
-    handlers: dict[EventType, list[HandlerMetaData]] = defaultdict(list)
+    """ EventType - (handler_id - HandlerMetaData), 保持注册顺序 """
+    handlers: dict[EventType, dict[str, HandlerMetaData]] = defaultdict(dict)
+
+    """ 二级索引，随每次变更同步维护 """
+    by_id: dict[str, HandlerMetaData] = {}
+    by_module: dict[str, dict[str, HandlerMetaData]] = defaultdict(dict)
+    by_plugin: dict[str, dict[str, HandlerMetaData]] = defaultdict(dict)
+
+    """ EventType - DispatchPlan, 变更时失效，下次分发时整体重新编译(写时复制) """
+    plans: dict[EventType, DispatchPlan] = {}
+
+    """ EventType - DispatchGroups, 与分发计划同时编译 """
+    groups: dict[EventType, DispatchGroups] = {}
+
+    """ EventType - (总是参与分发的计划, 执行组, 路由键 - 候选计划) """
+    routes: dict[EventType, tuple[DispatchPlan, DispatchGroups, dict[tuple, DispatchPlan]]] = {}
+
+    """ 过期处理器与已触发的一次性处理器由时间轮在后台移除 """
+    expiry: TimerWheel = TimerWheel(tick=1.0, slots=512)
 
     @classmethod
     def register(
-        cls, 
-        priority: int, 
+        cls,
+        priority: int,
         temp: bool,
         block: bool,
         expire_time: int,
         callback: callable,
         module: str,
         event_type: EventType,
-        rule: Rule
+        rule: Rule,
+        timeout: float = None
     ) -> HandlerMetaData:
-        heapq.heappush(cls.handlers[event_type], HandlerMetaData(
+        handler = HandlerMetaData(
             priority=priority,
             temp=temp,
             block=block,
             expire_time=expire_time,
-            callback=callback, 
+            callback=callback,
             module=module,
-            plugin=None,  # 在插件加载时候赋值 
+            plugin=None,  # 在插件加载时候赋值
             event_type=event_type,
-            rule=rule
-        ))
+            rule=rule,
+            timeout=timeout
+        )
+        cls.handlers[event_type][handler.id] = handler
+        cls.by_id[handler.id] = handler
+        cls.by_module[module][handler.id] = handler
+        if rule is not None:
+            rule.attach()
+        cls.invalidate(event_type)
+        if expire_time:
+            cls.expiry.schedule(
+                handler.id,
+                _seconds_until(expire_time),
+                functools.partial(cls.retire, handler, immediately=True)
+            )
+        return handler
 
 
     @classmethod
     def unregister(cls, handler: HandlerMetaData) -> None:
-        event_type = handler.event_type
-        handlers = cls.handlers.get(event_type, [])            
-        cls.handlers[event_type] = [h for h in handlers if h != handler]
-        heapq.heapify(cls.handlers[event_type])
+        cls.unregister_many([handler])
+
+
+    @classmethod
+    def unregister_many(cls, handlers: list[HandlerMetaData]) -> None:
+        """批量移除处理器，每种事件类型的分发计划只失效一次"""
+        event_types = set()
+        for handler in handlers:
+            if cls.by_id.pop(handler.id, None) is None:
+                continue
+            cls.expiry.cancel(handler.id)
+            if handler.rule is not None:
+                handler.rule.detach()
+            cls.handlers[handler.event_type].pop(handler.id, None)
+            cls._discard_index(cls.by_module, handler.module, handler.id)
+            if handler.plugin is not None:
+                cls._discard_index(cls.by_plugin, handler.plugin.module, handler.id)
+            event_types.add(handler.event_type)
+
+        if event_types:
+            cls.invalidate(*event_types)
+
+
+    @classmethod
+    def bind(cls, handlers: list[HandlerMetaData], plugin_md: "PluginMetaData") -> None:
+        """将处理器绑定到插件实例，相关分发计划随之失效"""
+        for handler in handlers:
+            # 绑定方法 = 未绑定方法 + self
+            handler.callback = functools.partial(handler.callback, plugin_md.obj)
+            handler.plugin = plugin_md
+            cls.by_plugin[plugin_md.module][handler.id] = handler
+
+        if handlers:
+            cls.invalidate(*{handler.event_type for handler in handlers})
+
+
+    @classmethod
+    def retire(cls, handler: HandlerMetaData, immediately: bool = False) -> None:
+        """标记处理器失效，分发时直接跳过，实际移除在时间轮的下一个刻度进行"""
+        handler.expired = True
+        if immediately:
+            cls.unregister(handler)
+        else:
+            cls.expiry.schedule(
+                handler.id, 0, functools.partial(cls.unregister, handler)
+            )
+
+
+    @classmethod
+    def invalidate(cls, *event_types: EventType) -> None:
+        """使分发计划失效，不传参数时作用于全部事件类型"""
+        for event_type in event_types or list(cls.plans):
+            cls.plans.pop(event_type, None)
+            cls.groups.pop(event_type, None)
+            cls.routes.pop(event_type, None)
+
+
+    @classmethod
+    def compile(cls, event_type: EventType) -> DispatchPlan:
+        """编译分发计划和并发执行组"""
+        plan = compile_plan(cls.handlers.get(event_type, {}).values())
+        unrouted, routes = route_plan(plan)
+        cls.routes[event_type] = (unrouted, group_plan(unrouted), routes)
+        cls.groups[event_type] = group_plan(plan)
+        cls.plans[event_type] = plan
+        return plan
+
+
+    @classmethod
+    def get_plan(cls, event_type: EventType) -> DispatchPlan:
+        """根据事件类型返回分发计划"""
+        if (plan := cls.plans.get(event_type)) is None:
+            plan = cls.compile(event_type)
+        return plan
+
+
+    @classmethod
+    def get_groups(cls, event_type: EventType) -> DispatchGroups:
+        """根据事件类型返回并发执行组"""
+        if (groups := cls.groups.get(event_type)) is None:
+            cls.compile(event_type)
+            groups = cls.groups[event_type]
+        return groups
+
+
+    @classmethod
+    def route(cls, event: "MessageEvent") -> DispatchPlan:
+        """挑选事件的候选分发计划，命令、关键词和正则处理器只在索引命中时参与分发"""
+        unrouted, _, routes = cls._get_routes(event.event_type)
+        if not routes:
+            return unrouted
+        candidates = [routes[key] for key in route_keys(event) if key in routes]
+        return merge_plans(unrouted, *candidates) if candidates else unrouted
+
+
+    @classmethod
+    def route_groups(cls, event: "MessageEvent") -> DispatchGroups:
+        """挑选事件的候选执行组"""
+        unrouted, groups, routes = cls._get_routes(event.event_type)
+        if not routes:
+            return groups
+        candidates = [routes[key] for key in route_keys(event) if key in routes]
+        return group_plan(merge_plans(unrouted, *candidates)) if candidates else groups
+
+
+    @classmethod
+    def _get_routes(cls, event_type: EventType) -> tuple:
+        if (routes := cls.routes.get(event_type)) is None:
+            cls.compile(event_type)
+            routes = cls.routes[event_type]
+        return routes
 
 
     @classmethod
     def get_handlers_from_type(cls, event_type: EventType) -> list[HandlerMetaData]:
-        """根据事件类型返回订阅"""
-        return cls.handlers.get(event_type, [])
+        """根据事件类型返回订阅，按优先级排序"""
+        return sorted(cls.handlers.get(event_type, {}).values())
 
 
     @classmethod
     def get_handlers_from_module(cls, module: str) -> list[HandlerMetaData]:
         """根据所在模块返回订阅"""
-        res = []
-        for handlers in cls.handlers.values():
-            res.extend(
-                [handler for handler in handlers if handler.module == module]
-            )
-        
-        return res
-    
+        return list(cls.by_module.get(module, {}).values())
+
+
     @classmethod
     def get_handlers_from_plugin(cls, plugin_md: "PluginMetaData") -> list[HandlerMetaData]:
         """根据所在插件返回订阅"""
-        res = []
-        for handlers in cls.handlers.values():
-            res.extend(
-                [handler for handler in handlers if handler.plugin == plugin_md]
-            )
-        
-        return res
+        return list(cls.by_plugin.get(plugin_md.module, {}).values())
 
 
     @classmethod
-    def get_handler_from_id(cls, module: ModuleType) -> HandlerMetaData:
-        """根据所在模块返回订阅"""
-        return next(
-            (handler for handlerlist in cls.handlers.values() for handler in handlerlist if handler.module == module),
-            None
-        ) 
\ No newline at end of file
+    def get_handler_from_id(cls, handler_id: str) -> HandlerMetaData:
+        """根据ID返回订阅"""
+        return cls.by_id.get(handler_id)
+
+
+    @staticmethod
+    def _discard_index(index: dict[str, dict[str, HandlerMetaData]], key: str, handler_id: str) -> None:
+        """从二级索引中移除处理器，桶为空时一并删除"""
+        if (bucket := index.get(key)) is not None:
+            bucket.pop(handler_id, None)
+            if not bucket:
+                del index[key]
+
+
+def _seconds_until(expire_time: datetime.datetime | int | float) -> float:
+    """距离过期时间的秒数，数字类型视为时间戳"""
+    if isinstance(expire_time, datetime.datetime):
+        return (expire_time - datetime.datetime.now()).total_seconds()
+    return expire_time - time.time()
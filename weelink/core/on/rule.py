@@ -1,13 +1,48 @@
 # standard library
 import abc
 import re
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterable
 
 # local library
+from .matcher import CommandIndex, KeywordIndex, RegexIndex, required_literal
+from .evaluator import Op, Node, REORDER_INTERVAL, RuleStats, branch, evaluate, evaluate_async, leaf, reorder
+
 if TYPE_CHECKING:
-    from weelink.core.message import MessageEvent, MessageSource, Text
+    from weelink.core.message import MessageEvent
+
+
+def _text(event: "MessageEvent") -> str | None:
+    """返回文本消息的内容，非文本消息返回 None"""
+    return getattr(event.component, "text", None)
+
+
+def _casefolded(event: "MessageEvent", text: str) -> str:
+    """优先使用 Text 上缓存的折叠视图"""
+    return getattr(event.component, "casefolded", None) or text.casefold()
+
 
 class RuleChecker(abc.ABC):
+    """规则检查器
+
+    结果只取决于事件本身的检查器可声明 cacheable = True，同一事件中
+    cache_key() 相同的检查器只执行一次，结果由所有处理器共享
+
+    check 可以是协程函数，同一规则中的异步检查器并发执行；
+    权限、配额等查询外部存储的检查器可声明 ttl，结果按
+    (检查器, 发送者, 会话) 跨事件缓存 ttl 秒
+    """
+
+    """检查器成立的必要条件：至少命中其中一个路由键，供分发时挑选候选处理器"""
+    routes: frozenset[tuple] = None
+
+    """同一事件内是否可以复用检查结果"""
+    cacheable: bool = False
+
+    """声明的单次开销(微秒)，实测样本不足时用于排序"""
+    cost: float = 5.0
+
+    """跨事件缓存结果的秒数，为 0 表示不缓存"""
+    ttl: float = 0
 
     def __str__(self) -> None:
         return self.__class__.__name__
@@ -18,134 +53,343 @@ class RuleChecker(abc.ABC):
         raise NotImplementedError
 
 
+    def cache_key(self) -> tuple:
+        """缓存键，默认由检查器类型和全部参数组成，参数不可哈希时退化为实例本身"""
+        key = (self.__class__, *vars(self).values())
+        try:
+            hash(key)
+        except TypeError:
+            return (self.__class__, id(self))
+        return key
+
+
+    def attach(self) -> None:
+        """处理器注册时调用，用于加入共享索引"""
+
+
+    def detach(self) -> None:
+        """处理器移除时调用，用于退出共享索引"""
+
+
 class KeywordChecker(RuleChecker):
-    
+
+    cacheable = True
+    cost = 1.0
+
     def __init__(self, keywords: list[str]) -> None:
-        self.keywords = keywords 
+        self.keywords = frozenset(keywords)
+        self.routes = frozenset(("keyword", keyword) for keyword in self.keywords) or None
 
 
     def check(self, event: "MessageEvent") -> bool:
-        if not isinstance(event, Text):
-            raise Exception("KeywordChecker只支持Text类型的消息")
-        return any(keyword in event.component.text for keyword in self.keywords)
+        if (text := _text(event)) is None:
+            return False
+        # 所有关键词共用一个自动机，每个事件只扫描一次文本
+        if KeywordIndex.covers(self.keywords):
+            return not self.keywords.isdisjoint(KeywordIndex.match(event, text))
+        # 未注册的规则(如直接调用 check)不在索引中，逐个查找
+        return any(keyword in text for keyword in self.keywords)
+
+
+    def attach(self) -> None:
+        KeywordIndex.add(self.keywords)
+
+
+    def detach(self) -> None:
+        KeywordIndex.remove(self.keywords)
 
 
 class RegexChecker(RuleChecker):
-    
-    def __init__(self, pattern: str, flag: int) -> None:
-        self.pattern = re.compile(pattern)
+
+    cacheable = True
+    cost = 5.0
+
+    def __init__(self, pattern: str, flag: int = 0) -> None:
+        self.pattern = pattern
+        self.flag = flag
+        if (literal := required_literal(pattern, flag)) is not None:
+            self.routes = frozenset({("regex", literal)})
     
     def check(self, event: "MessageEvent") -> bool:
-        if not isinstance(event, Text):
-            raise Exception("RegexChecker只支持Text类型的消息")
-        return re.search(self.pattern, event.component.text, self.flag)
+        if (text := _text(event)) is None:
+            return False
+        # 匹配结果同时写入 event.matches，处理器可直接复用分组
+        return RegexIndex.search(event, text, self.pattern, self.flag) is not None
+
+
+    def attach(self) -> None:
+        RegexIndex.add(self.pattern, self.flag)
+
+
+    def detach(self) -> None:
+        RegexIndex.remove(self.pattern, self.flag)
 
 
 class StartsWithChecker(RuleChecker):
-    
+
+    cacheable = True
+    cost = 1.0
+
     def __init__(self, prefix: str, ignore_case: bool = False) -> None:
-        self.prefix = prefix
+        self.prefix = prefix.casefold() if ignore_case else prefix
         self.ignore_case = ignore_case
+        self.routes = frozenset({("command", self.prefix, ignore_case)})
     
     def check(self, event: "MessageEvent") -> bool:
-        if not isinstance(event, Text):
-            raise Exception("StartsWithChecker只支持Text类型的消息")
-        
-        text = event.component.text
-        prefix = self.prefix
-        
-        if self.ignore_case:
-            text = text.lower()
-            prefix = prefix.lower()
-            
-        return text.startswith(prefix)
+        if (text := _text(event)) is None:
+            return False
+        # 命令路由每个事件只查询一次前缀树，未注册的规则不在路由中，直接比较
+        if not CommandIndex.covers(self.prefix, self.ignore_case):
+            return (_casefolded(event, text) if self.ignore_case else text).startswith(self.prefix)
+        _, found = CommandIndex.match(event, text, self.ignore_case)
+        return self.prefix in found
+
+
+    def attach(self) -> None:
+        CommandIndex.add(self.prefix, self.ignore_case)
+
+
+    def detach(self) -> None:
+        CommandIndex.remove(self.prefix, self.ignore_case)
 
 
 class EndsWithChecker(RuleChecker):
-    
+
+    cacheable = True
+    cost = 0.5
+
     def __init__(self, suffix: str, ignore_case: bool = False) -> None:
-        self.suffix = suffix
+        self.suffix = suffix.casefold() if ignore_case else suffix
         self.ignore_case = ignore_case
     
     def check(self, event: "MessageEvent") -> bool:
-        if not isinstance(event, Text):
-            raise Exception("EndsWithChecker只支持Text类型的消息")
-        
-        text = event.component.text
-        suffix = self.suffix
-        
+        if (text := _text(event)) is None:
+            return False
         if self.ignore_case:
-            text = text.lower()
-            suffix = suffix.lower()
-            
-        return text.endswith(suffix)
+            text = _casefolded(event, text)
+        return text.endswith(self.suffix)
 
 
 class FullMatchChecker(RuleChecker):
-    
+
+    cacheable = True
+    cost = 1.0
+
     def __init__(self, text: str, ignore_case: bool = False) -> None:
-        self.text = text
+        self.text = text.casefold() if ignore_case else text
         self.ignore_case = ignore_case
+        self.routes = frozenset({("command", self.text, ignore_case)})
     
     def check(self, event: "MessageEvent") -> bool:
-        if not isinstance(event, Text):
-            raise Exception("FullMatchChecker只支持Text类型的消息")
-        
-        text = event.component.text
-        match_text = self.text
-        
-        if self.ignore_case:
-            text = text.lower()
-            match_text = match_text.lower()
-            
-        return text == match_text
+        if (text := _text(event)) is None:
+            return False
+        if not CommandIndex.covers(self.text, self.ignore_case):
+            return (_casefolded(event, text) if self.ignore_case else text) == self.text
+        target, found = CommandIndex.match(event, text, self.ignore_case)
+        return self.text in found and len(target) == len(self.text)
+
+
+    def attach(self) -> None:
+        CommandIndex.add(self.text, self.ignore_case)
+
+
+    def detach(self) -> None:
+        CommandIndex.remove(self.text, self.ignore_case)
 
 
 class ToMeChecker(RuleChecker):
-    
+
+    cacheable = True
+    cost = 0.2
+
     def check(self, event: "MessageEvent") -> bool:
         return getattr(event, "is_at", False)
 
 
 class FromChatroomChecker(RuleChecker):
 
+    cacheable = True
+    cost = 0.3
+
+    def __init__(self, chatroom_ids: Iterable[str] = None) -> None:
+        self.chatroom_ids = frozenset(chatroom_ids or ())
+        if self.chatroom_ids:
+            self.routes = frozenset(("conversation", chatroom_id) for chatroom_id in self.chatroom_ids)
+
     def check(self, event: "MessageEvent") -> bool:
-        return event.source == MessageSource.CHATROOM
+        # 运行时导入，避免与 weelink.core.message 循环导入
+        from weelink.core.message import MessageSource
+        if event.source != MessageSource.CHATROOM:
+            return False
+        return not self.chatroom_ids or event.conversation_id in self.chatroom_ids
 
 
 class FromFriendChecker(RuleChecker):
-    
+
+    cacheable = True
+    cost = 0.3
+
+    def __init__(self, wxids: Iterable[str] = None) -> None:
+        self.wxids = frozenset(wxids or ())
+        if self.wxids:
+            self.routes = frozenset(("conversation", wxid) for wxid in self.wxids)
+
+    def check(self, event: "MessageEvent") -> bool:
+        from weelink.core.message import MessageSource
+        if event.source != MessageSource.FRIEND:
+            return False
+        return not self.wxids or event.conversation_id in self.wxids
+
+
+class FromUserChecker(RuleChecker):
+    """发送者检查，群聊和私聊均适用"""
+
+    cacheable = True
+    cost = 0.3
+
+    def __init__(self, wxids: Iterable[str]) -> None:
+        self.wxids = frozenset(wxids)
+        self.routes = frozenset(("sender", wxid) for wxid in self.wxids) or None
+
     def check(self, event: "MessageEvent") -> bool:
-        return event.source == MessageSource.FRIEND
+        return getattr(event.sender, "wxid", None) in self.wxids
+
+
+"""路由键种类的选择性排序，越小越精确"""
+_ROUTE_RANKS = {"conversation": 0, "sender": 1, "command": 2}
+
+
+def _route_rank(routes: frozenset[tuple]) -> int:
+    return max(_ROUTE_RANKS.get(key[0], 3) for key in routes)
 
 
 class Rule:
+    """规则表达式，由检查器经 & | ~ 组合而成
+
+    首次求值时编译为展开后的表达式树，按检查器实测的开销和通过率
+    定期调整求值顺序，结果与声明顺序无关(检查器不应有副作用)
+    """
     
-    def __init__(self, *checkers: list[RuleChecker]):
-        self.checkers: list[RuleChecker] = checkers
+    def __init__(self, *checkers: "RuleChecker | Rule", op: Op = Op.AND):
+        self.op = Op(op)
+        self.operands: list[RuleChecker | Rule] = list(checkers)
+        self._program: Node = None
+        self._evaluations = 0
         
     def add_checker(self, checker: RuleChecker) -> None:
-        """添加额外的检查器"""
-        if checker not in self.checkers:
-            self.checkers.append(checker)
+        """添加额外的检查器，与原规则同时成立"""
+        if self.op != Op.AND:
+            self.operands, self.op = [Rule(*self.operands, op=self.op)], Op.AND
+        if checker not in self.operands:
+            self.operands.append(checker)
+        self._program = None
+    
+    @property
+    def checkers(self) -> list[RuleChecker]:
+        """规则中的全部检查器"""
+        checkers = []
+        for operand in self.operands:
+            checkers.extend(operand.checkers if isinstance(operand, Rule) else (operand, ))
+        return checkers
+    
+    @property
+    def is_async(self) -> bool:
+        """是否包含异步检查器"""
+        return self._compile().is_async
+    
+    @property
+    def routes(self) -> frozenset[tuple] | None:
+        """规则成立的必要路由键
+
+        AND 任取一个操作数的路由键即可；OR 需要每个操作数都有路由键，取并集；NOT 没有
+        """
+        if self.op == Op.NOT:
+            return None
+        routes = [
+            operand.routes for operand in self.operands
+        ]
+        if self.op == Op.AND:
+            # 任一操作数都是必要条件，优先选择最具选择性的(会话 > 发送者 > 文本)
+            return min(
+                (route for route in routes if route is not None),
+                key=_route_rank,
+                default=None
+            )
+        if not routes or any(route is None for route in routes):
+            return None
+        return frozenset().union(*routes)
+    
+    def attach(self) -> None:
+        checkers = self.checkers
+        for checker in checkers:
+            checker.attach()
+        RuleStats.add(checkers)
+        # 重新编译，叶子节点改用表中的统计
+        self._program = None
+
+    def detach(self) -> None:
+        checkers = self.checkers
+        for checker in checkers:
+            checker.detach()
+        RuleStats.remove(checkers)
+        self._program = None
     
     def check(self, event: "MessageEvent") -> bool:
         """检查消息是否符合规则 """
-        return True if not self.checkers \
-            else all(checker.check(event) for checker in self.checkers)
+        return evaluate(self._tick(), event)
+    
+    async def check_async(self, event: "MessageEvent") -> bool:
+        """包含异步检查器时使用"""
+        return await evaluate_async(self._tick(), event)
+    
+    def _tick(self) -> Node:
+        program = self._compile()
+        self._evaluations += 1
+        if self._evaluations % REORDER_INTERVAL == 0:
+            reorder(program)
+        return program
+    
+    def _compile(self) -> Node:
+        if self._program is None:
+            self._program = self._node()
+            reorder(self._program)
+        return self._program
+    
+    def _node(self) -> Node:
+        children = [
+            operand._node() if isinstance(operand, Rule) else leaf(operand)
+            for operand in self.operands
+        ]
+        return branch(self.op, children)
     
     def __and__(self, other: "Rule") -> "Rule":
         if not isinstance(other, Rule):
             return self
-        else:
-            return Rule(*self.checkers, *other.checkers)
-    
+        return Rule(*self._flat(Op.AND), *other._flat(Op.AND))
     
     def __rand__(self, other: "Rule") -> "Rule":
         if not isinstance(other, Rule):
             return self
-        else:
-            return Rule( *other.checkers, *self.checkers)
+        return Rule(*other._flat(Op.AND), *self._flat(Op.AND))
+    
+    def __or__(self, other: "Rule") -> "Rule":
+        if not isinstance(other, Rule):
+            return self
+        return Rule(*self._flat(Op.OR), *other._flat(Op.OR), op=Op.OR)
+    
+    def __ror__(self, other: "Rule") -> "Rule":
+        if not isinstance(other, Rule):
+            return self
+        return Rule(*other._flat(Op.OR), *self._flat(Op.OR), op=Op.OR)
+    
+    def __invert__(self) -> "Rule":
+        return Rule(self, op=Op.NOT)
+    
+    def _flat(self, op: Op) -> list["RuleChecker | Rule"]:
+        """同类运算直接展开操作数，否则作为整体"""
+        if self.op == op or (len(self.operands) == 1 and self.op != Op.NOT):
+            return list(self.operands)
+        return [self]
 
 
 def keyword(keywords: list[str]) -> Rule:
@@ -154,7 +398,7 @@ def keyword(keywords: list[str]) -> Rule:
     )
 
 
-def regex(pattern: str, flag: int) -> Rule:
+def regex(pattern: str, flag: int = 0) -> Rule:
     return Rule(
         RegexChecker(pattern, flag)
     )
@@ -184,14 +428,23 @@ def to_me() -> Rule:
     )
 
 
-def from_chatroom() -> Rule:
+def from_chatroom(chatroom_ids: Iterable[str] = None) -> Rule:
+    """来自群聊，指定 chatroom_ids 时只匹配这些群"""
+    return Rule(
+        FromChatroomChecker(chatroom_ids)
+    )
+
+
+def from_friend(wxids: Iterable[str] = None) -> Rule:
+    """来自私聊，指定 wxids 时只匹配这些好友"""
     return Rule(
-        FromChatroomChecker()
+        FromFriendChecker(wxids)
     )
 
 
-def from_friend() -> Rule:
+def from_user(wxids: Iterable[str]) -> Rule:
+    """发送者为指定用户"""
     return Rule(
-        FromFriendChecker()
+        FromUserChecker(wxids)
     )
 
@@ -3,7 +3,6 @@ import sys
 import time
 import shutil
 import asyncio
-import functools
 import importlib
 from pathlib import Path
 from typing import Awaitable
@@ -29,7 +28,8 @@ def registry_plugin(
     author: str,
     version: str,
     repo: str = None,
-    adapters: list[type[Adapter]] = []
+    adapters: list[type[Adapter]] = [],
+    timeout: float = None
 ) -> type[Plugin]:
     def decorator(cls: type[Plugin]) -> None:
         metadata = PluginMetaData(
@@ -39,6 +39,7 @@ def registry_plugin(
             desc=desc,
             repo=repo,
             adapters=adapters,
+            timeout=timeout,
             module=cls.__module__,
             cls=cls,
             obj=None
@@ -185,13 +186,10 @@ class PluginManager:
         except Exception as e:
             logger.error(f"插件 {plugin_name} on_Load回调执行失败: {e}")
         
-        handlers = HandleRegistry.get_handlers_from_plugin(plugin_md)
-        for handler in handlers:
-            # 绑定方法 = 未绑定方法 + self
-            handler.callback = functools.partial(
-                handler.callback, plugin_md.obj
-            )
-            handler.plugin = plugin_md
+        # 插件启用前处理器尚未绑定插件，只能按模块查找
+        HandleRegistry.bind(
+            HandleRegistry.get_handlers_from_module(plugin_md.module), plugin_md
+        )
         
         self.enabled_plugins[plugin_name] = plugin_md
         logger.success(f"插件 { plugin_name} 已启用")
@@ -216,9 +214,9 @@ class PluginManager:
             logger.error(f"插件 {plugin_name} on_Load回调执行失败: {e}")
         
         # 解绑处理回调
-        handlers = HandleRegistry.get_handlers_from_plugin(plugin_md=md)
-        for handler in handlers:
-            HandleRegistry.unregister(handler=handler)
+        HandleRegistry.unregister_many(
+            HandleRegistry.get_handlers_from_plugin(plugin_md=md)
+        )
 
         del self.enabled_plugins[plugin_name]
         logger.success(f"插件 { plugin_name} 已禁用")
@@ -39,6 +39,9 @@ class PluginMetaData:
     
     """插件配置"""
     config: PluginConfig = None
+    
+    """插件处理器默认超时时间(秒)"""
+    timeout: float = None
         
     
     async def check_version(self):
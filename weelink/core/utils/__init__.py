@@ -5,4 +5,6 @@ from .redis import redis
 from .device import create_device_id, create_device_name
 from .http import post, get
 from .paths import *
-from .context import Context
\ No newline at end of file
+from .context import Context
+from .timer_wheel import TimerWheel
+from .dedupe import BloomFilter, Deduplicator, RedisDeduplicator, create_deduplicator
\ No newline at end of file
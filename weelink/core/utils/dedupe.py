@@ -0,0 +1,168 @@
+# standard library
+import math
+import hashlib
+from collections import OrderedDict
+
+# local library
+from weelink.core.internal.config import conf
+
+
+class BloomFilter:
+    """定长位数组的布隆过滤器，容量内的误判率不超过 error_rate"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01) -> None:
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+
+    def add(self, key: str) -> None:
+        self.add_indexes(self.indexes(key))
+
+
+    def __contains__(self, key: str) -> bool:
+        return self.contains_indexes(self.indexes(key))
+
+
+    def indexes(self, key: str) -> list[int]:
+        """key 对应的位，参数相同的过滤器之间可以复用"""
+        # 双重哈希：一次摘要派生 k 个位置
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+
+    def add_indexes(self, indexes: list[int]) -> None:
+        bits = self._bits
+        for index in indexes:
+            bits[index >> 3] |= 1 << (index & 7)
+        self.count += 1
+
+
+    def contains_indexes(self, indexes: list[int]) -> bool:
+        bits = self._bits
+        for index in indexes:
+            if not bits[index >> 3] & (1 << (index & 7)):
+                return False
+        return True
+
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._bits)
+
+
+class Deduplicator:
+    """消息去重：精确 LRU 覆盖最近的消息，布隆过滤器覆盖更早的消息
+
+    先查 LRU，命中即为重复；未命中时再查两代布隆过滤器，覆盖最近
+    capacity 到 2 * capacity 条消息，超出 LRU 的重复消息同样会被拦下。
+    代价是布隆过滤器的误判：每条新消息约有 2 * error_rate 的概率被误判为重复，
+    内存只取决于 capacity 和 error_rate
+    """
+
+    def __init__(self, capacity: int, lru_size: int, error_rate: float = 1e-5) -> None:
+        self.capacity = capacity
+        self.lru_size = lru_size
+        self.error_rate = error_rate
+        self.duplicates = 0
+        """ LRU 之外由布隆过滤器判定的重复(含误判) """
+        self.bloom_hits = 0
+        self._current = BloomFilter(capacity, error_rate)
+        self._previous = BloomFilter(capacity, error_rate)
+        self._recent: OrderedDict[str, None] = OrderedDict()
+
+
+    async def seen(self, key: str) -> bool:
+        """返回 key 是否重复，未重复时记录下来"""
+        if self._seen_locally(key):
+            self.duplicates += 1
+            return True
+        return False
+
+
+    def _seen_locally(self, key: str) -> bool:
+        """本地判定是否重复，未重复时记录"""
+        if key in self._recent:
+            self._recent.move_to_end(key)
+            return True
+        # 两代过滤器参数相同，位置只需计算一次
+        indexes = self._current.indexes(key)
+        if self._current.contains_indexes(indexes) or self._previous.contains_indexes(indexes):
+            self.bloom_hits += 1
+            return True
+        self._remember(key, indexes)
+        return False
+
+
+    def _remember(self, key: str, indexes: list[int]) -> None:
+        if self._current.count >= self.capacity:
+            self._previous, self._current = self._current, BloomFilter(self.capacity, self.error_rate)
+        self._current.add_indexes(indexes)
+        self._recent[key] = None
+        while len(self._recent) > self.lru_size:
+            self._recent.popitem(last=False)
+
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.__class__.__name__,
+            "recent": len(self._recent),
+            "duplicates": self.duplicates,
+            "bloom_hits": self.bloom_hits,
+            "bloom_bytes": self._current.nbytes + self._previous.nbytes
+        }
+
+
+class RedisDeduplicator(Deduplicator):
+    """多实例共享的去重，以 Redis SET NX 为准，本地过滤器在前面挡掉已知的重复"""
+
+    PREFIX = "weelink:dedupe:"
+
+    def __init__(
+        self,
+        capacity: int,
+        lru_size: int,
+        ttl: int,
+        namespace: str = "",
+        error_rate: float = 1e-5,
+        client: any = None
+    ) -> None:
+        super().__init__(capacity, lru_size, error_rate)
+        self.ttl = ttl
+        # 不同去重阶段使用各自的命名空间，互不影响
+        self.prefix = f"{self.PREFIX}{namespace}:" if namespace else self.PREFIX
+        # client 需提供 set_if_absent(key, value, ex)，默认使用全局 Redis 连接
+        if client is None:
+            from weelink.core.utils import redis
+            client = redis
+        self.client = client
+
+
+    async def seen(self, key: str) -> bool:
+        if self._seen_locally(key):
+            self.duplicates += 1
+            return True
+        try:
+            created = await self.client.set_if_absent(self.prefix + key, 1, ex=self.ttl)
+        except Exception:
+            # Redis 不可用时退化为本地去重
+            return False
+        if not created:
+            self.duplicates += 1
+            return True
+        return False
+
+
+def create_deduplicator(namespace: str) -> Deduplicator:
+    """按配置创建去重器，namespace 区分不同的去重阶段"""
+    if conf.DEDUPE_BACKEND == "redis":
+        return RedisDeduplicator(
+            conf.DEDUPE_CAPACITY, conf.DEDUPE_LRU_SIZE, conf.DEDUPE_TTL,
+            namespace=namespace, error_rate=conf.DEDUPE_ERROR_RATE
+        )
+    return Deduplicator(conf.DEDUPE_CAPACITY, conf.DEDUPE_LRU_SIZE, conf.DEDUPE_ERROR_RATE)
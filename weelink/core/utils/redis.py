@@ -42,6 +42,15 @@ class Redis:
             raise
 
 
+    async def set_if_absent(self, key: str, value: any, ex: int = None) -> bool:
+        """key 不存在时写入，返回是否写入成功"""
+        try:
+            return bool(await self._redis.set(key, value, nx=True, ex=ex))
+        except Exception as e:
+            logger.error(f"Redis 写入失败: {key}, 错误: {e}")
+            raise
+
+
     async def get(self, key: str, **kwargs) -> any:
         """读取 Redis"""
         try:
@@ -69,6 +78,15 @@ class Redis:
             yield key
             
             
+    async def eval(self, script: str, numkeys: int, *keys_and_args: any) -> any:
+        """执行 Lua 脚本"""
+        try:
+            return await self._redis.eval(script, numkeys, *keys_and_args)
+        except Exception as e:
+            logger.error(f"Redis 脚本执行失败, 错误: {e}")
+            raise
+
+
     async def exists(self, key: str) -> bool:
         """
         判断指定 key 是否存在于 Redis
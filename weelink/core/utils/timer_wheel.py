@@ -0,0 +1,83 @@
+# standard library
+import math
+import time
+import asyncio
+from typing import Hashable
+
+# local library
+from weelink.core.utils.logger import logger
+
+
+class TimerWheel:
+    """哈希时间轮，定时任务的添加、取消和触发均摊为 O(1)"""
+
+    def __init__(self, tick: float = 1.0, slots: int = 512) -> None:
+        self.tick = tick
+        self.slots = slots
+        self._cursor = 0
+        self._wheel: list[dict[Hashable, list]] = [{} for _ in range(slots)]
+        """ key - 所在槽位 """
+        self._index: dict[Hashable, int] = {}
+        self._task: asyncio.Task = None
+
+
+    def schedule(self, key: Hashable, delay: float, callback: callable) -> None:
+        """delay 秒后执行 callback，同一个 key 重复添加时覆盖之前的任务"""
+        self.cancel(key)
+        ticks = max(1, math.ceil(delay / self.tick))
+        slot = (self._cursor + ticks) % self.slots
+        rounds = (ticks - 1) // self.slots
+        self._wheel[slot][key] = [rounds, callback]
+        self._index[key] = slot
+
+
+    def cancel(self, key: Hashable) -> None:
+        """取消定时任务"""
+        if (slot := self._index.pop(key, None)) is not None:
+            self._wheel[slot].pop(key, None)
+
+
+    def start(self) -> None:
+        """启动时间轮"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+
+    async def stop(self) -> None:
+        """停止时间轮"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+    async def _run(self) -> None:
+        next_time = time.monotonic()
+        while True:
+            next_time += self.tick
+            await asyncio.sleep(max(0, next_time - time.monotonic()))
+            self._advance()
+
+
+    def _advance(self) -> None:
+        """指针前进一格，触发到期任务"""
+        self._cursor = (self._cursor + 1) % self.slots
+        bucket = self._wheel[self._cursor]
+        for key, item in list(bucket.items()):
+            if item[0] > 0:
+                item[0] -= 1
+                continue
+            del bucket[key]
+            del self._index[key]
+            try:
+                item[1]()
+            except Exception as e:
+                logger.error(f"时间轮任务 {key} 执行失败: {e}")
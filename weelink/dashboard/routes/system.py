@@ -1,6 +1,6 @@
 # standard library
 from typing import Annotated
-from fastapi import APIRouter, Query, Depends, HTTPException, Request
+from fastapi import APIRouter, Query, Depends, HTTPException, Request, Body
 # local library
 from weelink.core.linkhub import Linkhub
 from weelink.core.internal.config import conf
@@ -18,4 +18,35 @@ async def restart_linkhub_api(
         raise HTTPException(status_code=500, detail="无法访问 Initiator 实例")
     
     initiator = request.app.state.initiator
-    return await initiator.restart_linkhub()
\ No newline at end of file
+    return await initiator.restart_linkhub()
+
+
+@router.get("/broker", dependencies=[Depends(login_required)])
+async def broker_stats_api(
+    linkhub: Annotated[Linkhub, Depends(get_linkhub)]
+):
+    return {
+        "broker": linkhub.broker.stats()
+    }
+
+
+
+@router.get("/middleware", dependencies=[Depends(login_required)])
+async def middleware_stats_api(
+    linkhub: Annotated[Linkhub, Depends(get_linkhub)]
+):
+    return {
+        "timing_enabled": linkhub.middleware_manager.timing_enabled,
+        "middlewares": linkhub.middleware_manager.list_middlewares()
+    }
+
+
+@router.post("/middleware/timing", dependencies=[Depends(login_required)])
+async def middleware_timing_api(
+    enable: Annotated[bool, Body(embed=True)],
+    linkhub: Annotated[Linkhub, Depends(get_linkhub)],
+    reset: Annotated[bool, Body(embed=True)] = False
+):
+    if reset:
+        linkhub.middleware_manager.reset_timing()
+    linkhub.middleware_manager.set_timing(enable)